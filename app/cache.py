@@ -0,0 +1,107 @@
+from flask import request, Response
+from flask_login import current_user
+from functools import wraps
+from datetime import datetime, timezone
+import hashlib
+import json
+import logging
+import os
+import time
+import redis
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_TTL = int(os.environ.get('APP_RESPONSE_CACHE_TTL', 30))  # seconds
+
+# Headers of a cached response worth replaying (pagination links)
+CACHED_HEADERS = ['X-Next-Cursor', 'Link']
+
+redis_client = redis.Redis(
+    host=os.environ.get('REDIS_HOST'),
+    port=os.environ.get('REDIS_PORT') or 6379,
+    password=os.environ.get('REDIS_PASSWORD'),
+    db=os.environ.get('REDIS_DATABASE') or 0,
+    socket_timeout=0.5
+)
+
+def data_version(user_id):
+    """(version, last modified) of a user's cashflow/wallet data.
+
+    Both bots bump user:dataver / user:datamod after every write. A missing
+    counter (evicted, Redis restarted) is seeded with the current epoch in ms
+    rather than read as 0, so it never repeats a version an old ETag was
+    built from. Returns None when Redis is unreachable so callers skip caching.
+    """
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.set(f'user:dataver:{user_id}', int(time.time() * 1000), nx=True)
+        pipe.mget(f'user:dataver:{user_id}', f'user:datamod:{user_id}')
+        _, (version, modified) = pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f'Data version unavailable: {e}')
+        return None
+
+    modified = datetime.fromtimestamp(int(modified), tz=timezone.utc) if modified else None
+    return int(version), modified
+
+def conditional_json(view):
+    """ETag / Last-Modified / 304 plus a short-lived response cache for a
+    JSON view whose body only depends on the user's data and query args"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        state = data_version(current_user.id)
+        if state is None:
+            return view(*args, **kwargs)
+        version, modified = state
+
+        request_key = json.dumps(sorted(request.args.items(multi=True)))
+        digest = hashlib.sha256(
+            f'{current_user.id}|{request.endpoint}|{request_key}|{version}'.encode()
+        ).hexdigest()
+        etag = digest[:32]
+
+        if request.if_none_match:
+            not_modified = request.if_none_match.contains_weak(etag)
+        else:
+            not_modified = bool(modified and request.if_modified_since
+                                and modified.replace(microsecond=0) <= request.if_modified_since)
+        if not_modified:
+            response = Response(status=304)
+        else:
+            response = _cached_response(digest)
+            if response is None:
+                response = view(*args, **kwargs)
+                _store_response(digest, response)
+
+        response.set_etag(etag)
+        if modified:
+            response.last_modified = modified
+        # Always revalidate, but the revalidation is cheap
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    return wrapper
+
+def _cached_response(digest):
+    try:
+        cached = redis_client.get(f'http:response:{digest}')
+    except redis.RedisError:
+        return None
+    if not cached:
+        return None
+
+    cached = json.loads(cached)
+    return Response(cached['body'], mimetype=cached['mimetype'], headers=cached['headers'])
+
+def _store_response(digest, response):
+    if response.status_code != 200 or response.is_streamed:
+        return
+
+    cached = {
+        'body': response.get_data(as_text=True),
+        'mimetype': response.mimetype,
+        'headers': {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers}
+    }
+    try:
+        redis_client.set(f'http:response:{digest}', json.dumps(cached), ex=RESPONSE_CACHE_TTL)
+    except redis.RedisError as e:
+        logger.warning(f'Response not cached: {e}')
@@ -1,116 +1,167 @@
-from flask import Blueprint, render_template, request, jsonify
+from flask import Blueprint, render_template, request, jsonify, url_for, abort, Response, stream_with_context
 from flask_login import login_required, current_user
 from app.models.cashflow import Cashflow
 from app.models.wallet import Wallet
-from datetime import datetime, timedelta
+from app.export import csv_chunks, xlsx_chunks
+from app.cache import conditional_json
+from bot.helpers.cashflow_filter import CashflowFilter, FilterError
+from datetime import datetime
 from sqlalchemy import and_, or_
+import base64
+import binascii
+import json
 
 transaction_bp = Blueprint('transaction', __name__)
 
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+STREAM_BATCH_SIZE = 1000
+EXPORT_YIELD_PER = 2000
+
+# Plain columns (no ORM objects, no per-row wallet lazy load)
+TRANSACTION_COLUMNS = (
+    Cashflow.id,
+    Cashflow.activityName,
+    Cashflow.description,
+    Cashflow.transactionDate,
+    Cashflow.flowType,
+    Cashflow.total,
+    Cashflow.categoryId,
+    Cashflow.walletId,
+    Wallet.name.label('wallet_name'),
+)
+
+EXPORT_COLUMNS = TRANSACTION_COLUMNS + (Cashflow.quantity, Cashflow.unit, Cashflow.price)
+
+EXPORT_FORMATS = {
+    'csv': (csv_chunks, 'text/csv'),
+    'xlsx': (xlsx_chunks, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
+
+def _filtered_query():
+    """Cashflow query for the current user with the start_date, end_date,
+    category, flow_type and wallet_id request filters applied"""
+    try:
+        cashflow_filter = CashflowFilter.from_request_args(current_user.id, request.args)
+    except FilterError as error:
+        abort(400, description=str(error))
+    
+    return Cashflow.query.filter(*cashflow_filter.criteria(Cashflow))
+
+def _encode_cursor(row):
+    raw = f'{row.transactionDate.isoformat()}|{row.id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_cursor(cursor):
+    try:
+        transaction_date, transaction_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|', 1)
+        return datetime.fromisoformat(transaction_date), transaction_id
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        return None
+
+def _page_size():
+    try:
+        return max(1, min(int(request.args.get('limit', PAGE_SIZE)), MAX_PAGE_SIZE))
+    except ValueError:
+        return PAGE_SIZE
+
+def _fetch_page(query, cursor, limit):
+    """Rows after `cursor` in (transactionDate, id) descending order plus the next cursor"""
+    query = query.join(Wallet, Wallet.id == Cashflow.walletId).with_entities(*TRANSACTION_COLUMNS)
+
+    after = _decode_cursor(cursor) if cursor else None
+    if after:
+        transaction_date, transaction_id = after
+        query = query.filter(or_(
+            Cashflow.transactionDate < transaction_date,
+            and_(Cashflow.transactionDate == transaction_date, Cashflow.id < transaction_id)
+        ))
+
+    rows = query.order_by(Cashflow.transactionDate.desc(), Cashflow.id.desc()).limit(limit + 1).all()
+    next_cursor = _encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+def _serialize(row):
+    return {
+        'id': row.id,
+        'activityName': row.activityName,
+        'description': row.description,
+        'transactionDate': row.transactionDate.isoformat(),
+        'flowType': row.flowType,
+        'total': float(row.total),
+        'categoryId': row.categoryId,
+        'walletId': row.walletId,
+        'wallet_name': row.wallet_name
+    }
+
+def _stream_jsonl(query):
+    cursor = None
+    while True:
+        rows, cursor = _fetch_page(query, cursor, STREAM_BATCH_SIZE)
+        for row in rows:
+            yield json.dumps(_serialize(row)) + '\n'
+        if not cursor:
+            break
+
 @transaction_bp.route('/')
 @login_required
 def get_transactions():
-    # Get query parameters
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-    category = request.args.get('category')
-    flow_type = request.args.get('flow_type')
-    wallet_id = request.args.get('wallet_id')
+    query = _filtered_query()
     
-    # Build query
-    query = Cashflow.query.filter_by(userId=current_user.id, isActive=True)
+    transactions, next_cursor = _fetch_page(query, request.args.get('cursor'), _page_size())
     
-    # Apply filters
-    if start_date:
-        try:
-            start_date = datetime.strptime(start_date, '%Y-%m-%d')
-            query = query.filter(Cashflow.transactionDate >= start_date)
-        except ValueError:
-            pass
-    
-    if end_date:
-        try:
-            end_date = datetime.strptime(end_date, '%Y-%m-%d')
-            # Add 1 day to include the end date
-            end_date = end_date + timedelta(days=1)
-            query = query.filter(Cashflow.transactionDate < end_date)
-        except ValueError:
-            pass
-    
-    if category:
-        try:
-            category_id = int(category)
-            query = query.filter(Cashflow.categoryId == category_id)
-        except ValueError:
-            pass
-    
-    if flow_type and flow_type in ['income', 'expense', 'transfer']:
-        query = query.filter(Cashflow.flowType == flow_type)
-    
-    if wallet_id:
-        query = query.filter(Cashflow.walletId == wallet_id)
-    
-    transactions = query.order_by(Cashflow.transactionDate.desc()).all()
+    # Keyset pages only go forward; "first page" drops the cursor
+    args = {key: value for key, value in request.args.items() if key != 'cursor'}
+    first_url = url_for('transaction.get_transactions', **args) if request.args.get('cursor') else None
+    next_url = url_for('transaction.get_transactions', **args, cursor=next_cursor) if next_cursor else None
     
     # Get user wallets for filter dropdown
     wallets = Wallet.query.filter_by(userId=current_user.id, isActive=True).all()
     
-    return render_template('transactions.html', transactions=transactions, wallets=wallets)
+    return render_template('transactions.html', transactions=transactions, wallets=wallets,
+                           first_url=first_url, next_url=next_url)
 
 @transaction_bp.route('/api')
 @login_required
+@conditional_json
 def get_transactions_api():
-    # Similar filtering logic as above
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-    category = request.args.get('category')
-    flow_type = request.args.get('flow_type')
-    wallet_id = request.args.get('wallet_id')
-    
-    query = Cashflow.query.filter_by(userId=current_user.id, isActive=True)
-    
-    if start_date:
-        try:
-            start_date = datetime.strptime(start_date, '%Y-%m-%d')
-            query = query.filter(Cashflow.transactionDate >= start_date)
-        except ValueError:
-            pass
+    query = _filtered_query()
     
-    if end_date:
-        try:
-            end_date = datetime.strptime(end_date, '%Y-%m-%d')
-            end_date = end_date + timedelta(days=1)
-            query = query.filter(Cashflow.transactionDate < end_date)
-        except ValueError:
-            pass
+    # format=jsonl streams every matching row, fetched in keyset batches
+    if request.args.get('format') == 'jsonl':
+        return Response(stream_with_context(_stream_jsonl(query)), mimetype='application/x-ndjson')
     
-    if category:
-        try:
-            category_id = int(category)
-            query = query.filter(Cashflow.categoryId == category_id)
-        except ValueError:
-            pass
+    transactions, next_cursor = _fetch_page(query, request.args.get('cursor'), _page_size())
     
-    if flow_type and flow_type in ['income', 'expense', 'transfer']:
-        query = query.filter(Cashflow.flowType == flow_type)
-    
-    if wallet_id:
-        query = query.filter(Cashflow.walletId == wallet_id)
-    
-    transactions = query.order_by(Cashflow.transactionDate.desc()).all()
-    
-    transaction_data = []
-    for transaction in transactions:
-        transaction_data.append({
-            'id': transaction.id,
-            'activityName': transaction.activityName,
-            'description': transaction.description,
-            'transactionDate': transaction.transactionDate.isoformat(),
-            'flowType': transaction.flowType,
-            'total': float(transaction.total),
-            'categoryId': transaction.categoryId,
-            'walletId': transaction.walletId,
-            'wallet_name': transaction.wallet.name
-        })
-    
-    return jsonify(transaction_data)
\ No newline at end of file
+    response = jsonify([_serialize(transaction) for transaction in transactions])
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+        args = {key: value for key, value in request.args.items() if key != 'cursor'}
+        next_url = url_for('transaction.get_transactions_api', **args, cursor=next_cursor)
+        response.headers['Link'] = f'<{next_url}>; rel="next"'
+    return response
+
+@transaction_bp.route('/export')
+@login_required
+def export_transactions():
+    """Full history (same filters as the list) as CSV or XLSX"""
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': 'format must be csv or xlsx'}), 400
+    writer, mimetype = EXPORT_FORMATS[export_format]
+    
+    # yield_per streams from a server-side cursor instead of buffering the result
+    rows = (
+        _filtered_query()
+        .join(Wallet, Wallet.id == Cashflow.walletId)
+        .with_entities(*EXPORT_COLUMNS)
+        .order_by(Cashflow.transactionDate, Cashflow.id)
+        .yield_per(EXPORT_YIELD_PER)
+    )
+    
+    filename = f"cashflow_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{export_format}"
+    return Response(
+        stream_with_context(writer(rows)),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template, jsonify
 from flask_login import login_required, current_user
 from app.models.wallet import Wallet
+from app.cache import conditional_json
 
 wallet_bp = Blueprint('wallet', __name__)
 
@@ -12,6 +13,7 @@ def get_wallets():
 
 @wallet_bp.route('/api')
 @login_required
+@conditional_json
 def get_wallets_api():
     wallets = Wallet.query.filter_by(userId=current_user.id, isActive=True).all()
     wallet_data = []
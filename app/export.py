@@ -0,0 +1,86 @@
+import csv
+import io
+import os
+import tempfile
+import xlsxwriter
+
+EXPORT_HEADERS = [
+    'Date', 'Activity', 'Description', 'Wallet', 'Type',
+    'Quantity', 'Unit', 'Price', 'Total', 'Category', 'ID'
+]
+
+CSV_FLUSH_ROWS = 1000
+CHUNK_SIZE = 64 * 1024
+# Excel stops at 1,048,576 rows per sheet, continue on a new one before that
+XLSX_SHEET_ROWS = 1_000_000
+
+
+def export_values(row):
+    return [
+        row.transactionDate, row.activityName, row.description, row.wallet_name, row.flowType,
+        row.quantity, row.unit, row.price, row.total, row.categoryId, row.id
+    ]
+
+
+def csv_chunks(rows):
+    """Yield the CSV as encoded chunks, holding at most CSV_FLUSH_ROWS rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_HEADERS)
+
+    for count, row in enumerate(rows, 1):
+        values = export_values(row)
+        values[0] = values[0].strftime('%Y-%m-%d %H:%M:%S')
+        writer.writerow(values)
+
+        if count % CSV_FLUSH_ROWS == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def write_xlsx(rows, path):
+    """Write rows with xlsxwriter constant_memory mode (each row is flushed
+    to disk once the next one starts)"""
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+    date_format = workbook.add_format({'num_format': 'yyyy-mm-dd hh:mm:ss'})
+    money_format = workbook.add_format({'num_format': '#,##0.00'})
+
+    worksheet, row_number = None, XLSX_SHEET_ROWS
+    for row in rows:
+        if row_number >= XLSX_SHEET_ROWS:
+            worksheet = workbook.add_worksheet()
+            worksheet.write_row(0, 0, EXPORT_HEADERS)
+            worksheet.set_column(0, 0, 20)
+            row_number = 0
+        row_number += 1
+
+        values = export_values(row)
+        worksheet.write_datetime(row_number, 0, values[0], date_format)
+        worksheet.write_row(row_number, 1, values[1:5])
+        worksheet.write_number(row_number, 5, float(values[5] or 0))
+        worksheet.write(row_number, 6, values[6])
+        worksheet.write_number(row_number, 7, float(values[7] or 0), money_format)
+        worksheet.write_number(row_number, 8, float(values[8] or 0), money_format)
+        worksheet.write_row(row_number, 9, values[9:])
+
+    if worksheet is None:
+        workbook.add_worksheet().write_row(0, 0, EXPORT_HEADERS)
+    workbook.close()
+
+
+def xlsx_chunks(rows):
+    """Build the workbook in a temp file (a zip cannot be streamed while it
+    is written), then yield it in chunks and remove the file"""
+    handle, path = tempfile.mkstemp(suffix='.xlsx')
+    os.close(handle)
+    try:
+        write_xlsx(rows, path)
+        with open(path, 'rb') as workbook:
+            while chunk := workbook.read(CHUNK_SIZE):
+                yield chunk
+    finally:
+        os.remove(path)
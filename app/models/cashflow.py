@@ -4,6 +4,10 @@ import uuid
 
 class Cashflow(db.Model):
     __tablename__ = 'cashflow'
+    __table_args__ = (
+        db.Index('idx_user_active_date', 'userId', 'isActive', 'transactionDate'),
+        db.Index('idx_user_wallet_date', 'userId', 'walletId', 'transactionDate'),
+    )
     
     id = db.Column(db.String(24), primary_key=True, default=lambda: str(uuid.uuid4()).replace('-', '')[:24])
     userId = db.Column(db.String(24), db.ForeignKey('users.id'), nullable=False)
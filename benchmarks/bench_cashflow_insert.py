@@ -0,0 +1,88 @@
+"""Per-row vs bulk cashflow insert on the legacy mysql-connector path.
+
+Runs against the MySQL configured in .env (MYSQL_*). Rows are written under a
+throwaway user/wallet id and deleted afterwards.
+
+    python -m benchmarks.bench_cashflow_insert
+"""
+import time
+from decimal import Decimal
+from datetime import datetime
+from bson import ObjectId
+from lib.database.db import DatabaseConnection
+from lib.database.model.cashflow_model import CashflowItem
+from lib.database.model.wallet_model import Wallet
+from lib.database.manager.cashflow_manager import CashflowManager
+from lib.database.manager.wallet_manager import WalletManager
+
+BATCH_SIZES = [1, 10, 100]
+REPEAT = 5
+
+
+def make_items(user_id, wallet_id, count):
+    return [
+        CashflowItem(
+            id=str(ObjectId()),
+            userId=user_id,
+            walletId=wallet_id,
+            transactionDate=datetime.now().replace(microsecond=0),
+            activityName=f'bench item {i}',
+            description='',
+            quantity=1,
+            unit='unit',
+            flowType='expense',
+            price=1000,
+            total=1000,
+        )
+        for i in range(count)
+    ]
+
+
+def per_row(cashflow_manager, wallet_manager, wallet, items):
+    """What bot_listener.save_confirmed_transaction used to do."""
+    for item in items:
+        cashflow_manager.insert_cashflow(item)
+    current = wallet_manager.get_wallet_by_id(wallet.id)
+    wallet_manager.update_balance(wallet.id, current.balance - sum(item.total for item in items))
+
+
+def bulk(cashflow_manager, wallet_manager, wallet, items):
+    cashflow_manager.insert_cashflows_bulk(items, wallet.id, -sum(item.total for item in items))
+
+
+def cleanup(db, user_id, wallet_id):
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    cursor.execute('DELETE FROM cashflow WHERE userId = %s', (user_id,))
+    cursor.execute('DELETE FROM wallets WHERE id = %s', (wallet_id,))
+    conn.commit()
+    conn.close()
+
+
+def main():
+    db = DatabaseConnection()
+    cashflow_manager = CashflowManager(db)
+    wallet_manager = WalletManager(db)
+
+    user_id = str(ObjectId())
+    wallet = Wallet(id=str(ObjectId()), userId=user_id, name='bench', description='', balance=Decimal('0'))
+    wallet_manager.insert_wallet(wallet)
+
+    try:
+        print(f"{'items':>5} | {'per-row ms':>10} | {'bulk ms':>8} | {'speedup':>7}")
+        for size in BATCH_SIZES:
+            timings = {}
+            for name, path in (('per-row', per_row), ('bulk', bulk)):
+                started = time.perf_counter()
+                for _ in range(REPEAT):
+                    path(cashflow_manager, wallet_manager, wallet, make_items(user_id, wallet.id, size))
+                timings[name] = (time.perf_counter() - started) / REPEAT * 1000
+
+            print(f"{size:>5} | {timings['per-row']:>10.1f} | {timings['bulk']:>8.1f} | "
+                  f"{timings['per-row'] / timings['bulk']:>6.1f}x")
+    finally:
+        cleanup(db, user_id, wallet.id)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Charts per second through ChartService on one worker (one core).
+
+Renders report_figure() pies and lines built from a synthetic month of
+cashflow, first one at a time (latency) and then with the queue kept full
+(throughput). Also times a few cold renders that start a new browser per
+chart, which is what calling kaleido inside a handler would cost.
+Needs Chrome for kaleido (`kaleido_get_chrome`).
+
+    python -m benchmarks.bench_chart_render [charts]
+"""
+import sys
+import time
+import asyncio
+from datetime import datetime
+import kaleido
+from bot.services.chart import ChartService, report_figure
+from bot.services.report_frame import frame_from_rows
+from benchmarks.bench_report_frame import make_rows, as_query_rows
+
+CHARTS = 60
+COLD_CHARTS = 3
+
+
+def figures(count):
+    frame = frame_from_rows(as_query_rows(make_rows(5_000)))
+    start, end = datetime(2024, 1, 1), datetime(2025, 1, 1)
+    kinds = ['pie', 'line']
+    return [report_figure(kinds[i % 2], frame, start, end) for i in range(count)]
+
+
+async def warm(service, charts):
+    started = time.perf_counter()
+    for figure in charts:
+        await service.render(figure)
+    serial = time.perf_counter() - started
+
+    started = time.perf_counter()
+    await asyncio.gather(*(service.render(figure) for figure in charts))
+    queued = time.perf_counter() - started
+    return serial, queued
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else CHARTS
+    charts = figures(count)
+
+    started = time.perf_counter()
+    for figure in charts[:COLD_CHARTS]:
+        kaleido.calc_fig_sync(figure, opts={'format': 'png', 'width': 800, 'height': 500})
+    cold = (time.perf_counter() - started) / COLD_CHARTS
+
+    service = ChartService(workers=1, queue_size=count)
+    started = time.perf_counter()
+    service.start()
+    boot = time.perf_counter() - started
+
+    try:
+        serial, queued = asyncio.run(warm(service, charts))
+    finally:
+        service.close()
+
+    print(f'pool start        {boot:8.2f} s')
+    print(f'cold render       {cold * 1000:8.1f} ms/chart')
+    print(f'warm render       {serial / count * 1000:8.1f} ms/chart')
+    print(f'warm throughput   {count / queued:8.2f} charts/s (1 worker, queue {count})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Memory ceiling for the streamed CSV/XLSX export in app.export.
+
+Feeds synthetic rows (shaped like the export query result) through
+csv_chunks() and xlsx_chunks() from a generator, the way a yield_per cursor
+hands them over. Each format runs in a fresh process and the growth of its
+peak RSS over the pre-export baseline is compared with the ceiling. Exits 1
+if a format goes over it, i.e. if memory grows with the row count.
+
+    python -m benchmarks.bench_export_memory [rows] [ceiling_mb]
+"""
+import sys
+import time
+import resource
+import multiprocessing
+from collections import namedtuple
+from datetime import datetime, timedelta
+from decimal import Decimal
+from app.export import csv_chunks, xlsx_chunks
+
+ROWS = 1_000_000
+CEILING_MB = 64
+
+ExportRow = namedtuple('ExportRow', [
+    'id', 'activityName', 'description', 'transactionDate', 'flowType', 'total',
+    'categoryId', 'walletId', 'wallet_name', 'quantity', 'unit', 'price'
+])
+
+
+def synthetic_rows(count):
+    start = datetime(2020, 1, 1)
+    for i in range(count):
+        price = Decimal(1000 + i % 50000) / 100
+        yield ExportRow(
+            id=f'{i:024x}',
+            activityName=f'nasi uduk {i % 97}',
+            description='',
+            transactionDate=start + timedelta(minutes=i),
+            flowType='income' if i % 3 == 0 else 'expense',
+            total=price * 2,
+            categoryId=1,
+            walletId='66a1b2c3d4e5f6a7b8c9d0e1',
+            wallet_name='cash',
+            quantity=Decimal('2.0000'),
+            unit='porsi',
+            price=price,
+        )
+
+
+def _max_rss_mb():
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _export(writer, count, results):
+    baseline = _max_rss_mb()
+    started = time.perf_counter()
+    size = 0
+    for chunk in writer(synthetic_rows(count)):
+        size += len(chunk)
+    results.put((_max_rss_mb() - baseline, size / 1024 / 1024, time.perf_counter() - started))
+
+
+def measure(writer, count):
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_export, args=(writer, count, results))
+    process.start()
+    measured = results.get()
+    process.join()
+    return measured
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else ROWS
+    ceiling = float(sys.argv[2]) if len(sys.argv) > 2 else CEILING_MB
+    ok = True
+
+    print(f'{"format":<6} {"rows":>9} {"+RSS MB":>8} {"output MB":>10} {"seconds":>8}')
+    for name, writer in [('csv', csv_chunks), ('xlsx', xlsx_chunks)]:
+        peak, size, seconds = measure(writer, count)
+        ok = ok and peak <= ceiling
+        print(f'{name:<6} {count:>9} {peak:>8.1f} {size:>10.1f} {seconds:>8.1f}')
+
+    print(f'ceiling {ceiling} MB: {"ok" if ok else "EXCEEDED"}')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""Report shaping with dict loops vs the vectorized frame in bot.services.report_frame.
+
+The dict side gets (datetime, walletId, activityName, flowType, cents)
+tuples, the frame side the same rows the way cashflow_columns_query()
+returns them (seconds since epoch instead of datetime). Both compute weekly
+flow totals, a daily running balance and the top 5 expense activities.
+Results are compared so the speedup is not bought with a different answer;
+exits 1 if they disagree.
+
+    python -m benchmarks.bench_report_frame [rows ...]
+"""
+import sys
+import time
+import random
+from calendar import timegm
+from collections import defaultdict
+from datetime import datetime, timedelta
+from bot.services.report_frame import (
+    frame_from_rows, flow_pivot, running_balance, top_activities
+)
+
+SIZES = [10_000, 100_000, 1_000_000]
+
+ACTIVITIES = ['nasi uduk', 'bensin', 'kopi', 'gaji', 'listrik', 'pulsa', 'sewa', 'bahan baku', 'ongkir', 'parkir']
+WALLETS = [f'66a1b2c3d4e5f6a7b8c9d0{i:02d}' for i in range(5)]
+FLOWS = ['income', 'expense', 'expense', 'transfer']
+
+
+def make_rows(count, seed=7):
+    random.seed(seed)
+    start = datetime(2024, 1, 1)
+    span = 365 * 24 * 3600
+    return sorted(
+        (
+            start + timedelta(seconds=random.randrange(span)),
+            random.choice(WALLETS),
+            random.choice(ACTIVITIES),
+            random.choice(FLOWS),
+            random.randrange(1_000, 5_000_000),
+        )
+        for _ in range(count)
+    )
+
+
+def dict_report(rows):
+    weekly = defaultdict(lambda: defaultdict(int))
+    daily_net = defaultdict(int)
+    expenses = defaultdict(int)
+
+    for date, _, activity, flow_type, cents in rows:
+        day = date.date()
+        week = day - timedelta(days=day.weekday())
+        weekly[week][flow_type] += cents
+
+        if flow_type == 'income':
+            daily_net[day] += cents
+        elif flow_type == 'expense':
+            daily_net[day] -= cents
+            expenses[activity.strip().lower()] += cents
+
+    balance, balances = 0, {}
+    day, last = min(daily_net), max(daily_net)
+    while day <= last:
+        balance += daily_net.get(day, 0)
+        balances[day] = balance
+        day += timedelta(days=1)
+
+    top = sorted(expenses.items(), key=lambda item: item[1], reverse=True)[:5]
+    return weekly, balances, top
+
+
+def as_query_rows(rows):
+    return [(timegm(date.timetuple()), *rest) for date, *rest in rows]
+
+
+def frame_report(rows):
+    frame = frame_from_rows(rows)
+    return (
+        flow_pivot(frame, 'week'),
+        running_balance(frame, 'day'),
+        top_activities(frame, 'expense', 5),
+    )
+
+
+def same_result(by_dict, by_frame):
+    weekly, balances, top = by_dict
+    pivot, balance, top_frame = by_frame
+
+    for week, flows in weekly.items():
+        row = pivot.loc[str(week)]
+        if any(int(row[flow]) != flows.get(flow, 0) for flow in pivot.columns):
+            return False
+
+    if {key.date(): int(value) for key, value in balance.items()} != balances:
+        return False
+    return list(top_frame.items()) == top
+
+
+def timed(func, rows):
+    started = time.perf_counter()
+    result = func(rows)
+    return result, time.perf_counter() - started
+
+
+def main():
+    sizes = [int(size) for size in sys.argv[1:]] or SIZES
+    ok = True
+
+    print(f'{"rows":>10} {"dict s":>9} {"pandas s":>9} {"speedup":>8}  match')
+    for size in sizes:
+        rows = make_rows(size)
+        by_dict, dict_seconds = timed(dict_report, rows)
+        by_frame, frame_seconds = timed(frame_report, as_query_rows(rows))
+        match = same_result(by_dict, by_frame)
+        ok = ok and match
+
+        print(f'{size:>10} {dict_seconds:>9.3f} {frame_seconds:>9.3f} {dict_seconds / frame_seconds:>7.1f}x  {match}')
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""Encode/decode time and stored size of cached conversation values.
+
+Compares the serializers in bot.services.serializer on payloads shaped like
+what CacheMessage stores per active user. With --redis it also writes each
+encoding to the configured Redis and reports MEMORY USAGE for the key.
+
+    python -m benchmarks.bench_serializer [--redis]
+"""
+import sys
+import timeit
+from bot.services.serializer import JsonSerializer, MsgpackSerializer
+
+ROUNDS = 2000
+
+
+def wallets(count):
+    return [
+        {'id': f'66a1b2c3d4e5f6a7b8c9d0{i:02d}', 'name': f'Wallet {i}', 'balance': 1250000.0 + i}
+        for i in range(count)
+    ]
+
+
+def transaction_state(items):
+    return {
+        'intent': 'CATAT_TRANSAKSI',
+        'content': [
+            {
+                'date': '2025-07-14 14:20:21',
+                'activityName': f'nasi uduk {i}',
+                'quantity': 20,
+                'unit': 'porsi',
+                'flowType': 'income',
+                'itemType': 'product',
+                'price': 15000,
+                'wallet': 'cash'
+            }
+            for i in range(items)
+        ],
+        'user': {
+            'id': '66a1b2c3d4e5f6a7b8c9d0e1',
+            'name': 'Bench User',
+            'username': 'bench',
+            'telegramId': 123456789,
+            'isActive': True,
+            'wallets': wallets(5)
+        },
+        'inputToken': 812,
+        'outputToken': 240
+    }
+
+
+def chat_context(messages):
+    return {
+        'messages': [
+            {
+                'id': 1721000000 + i,
+                'text': 'hari ini jual 20 nasi uduk seharga 15000 per nasi dibayar cash',
+                'timestamp': '2025-07-14T14:20:21.000000',
+                'role': 'user' if i % 2 == 0 else 'model'
+            }
+            for i in range(messages)
+        ],
+        'topic': 'general',
+        'intent': None,
+        'entities': {},
+        'created_at': '2025-07-14T14:20:21.000000',
+        'updated_at': '2025-07-14T14:20:21.000000'
+    }
+
+
+PAYLOADS = {
+    'tanya_wallet': {'intent': 'TANYA_WALLET', 'content': '', 'user': transaction_state(0)['user']},
+    'transaction_3_items': transaction_state(3),
+    'receipt_30_items': transaction_state(30),
+    'context_20_messages': chat_context(20),
+}
+
+SERIALIZERS = {
+    'json': JsonSerializer(),
+    'msgpack': MsgpackSerializer(threshold=1 << 30),
+    'msgpack+zlib': MsgpackSerializer(),
+}
+
+
+def redis_memory(client, key, data):
+    client.set(key, data)
+    try:
+        return client.memory_usage(key)
+    finally:
+        client.delete(key)
+
+
+def main():
+    client = None
+    if '--redis' in sys.argv:
+        import redis
+        from bot.constants import REDIS_HOST, REDIS_PORT, REDIS_PASSWORD, REDIS_DATABASE
+        client = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, password=REDIS_PASSWORD, db=REDIS_DATABASE)
+
+    header = f"{'payload':<22} | {'serializer':<13} | {'bytes':>6} | {'enc us':>7} | {'dec us':>7}"
+    if client:
+        header += f" | {'redis B':>7}"
+    print(header)
+
+    for payload_name, payload in PAYLOADS.items():
+        for serializer_name, serializer in SERIALIZERS.items():
+            data = serializer.dumps(payload)
+            assert serializer.loads(data) == payload
+
+            encode = timeit.timeit(lambda: serializer.dumps(payload), number=ROUNDS) / ROUNDS
+            decode = timeit.timeit(lambda: serializer.loads(data), number=ROUNDS) / ROUNDS
+
+            line = (f'{payload_name:<22} | {serializer_name:<13} | {len(data):>6} | '
+                    f'{encode * 1e6:>7.1f} | {decode * 1e6:>7.1f}')
+            if client:
+                line += f" | {redis_memory(client, 'bench:serializer', data):>7}"
+            print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""Per-message query count and rows materialized by the user lookup.
+
+Seeds an in-memory SQLite database with one user whose history grows, then
+runs the routing lookup ProfileCache._load makes on a cache miss next to the old
+eager-load-everything shape. Exits non-zero when the routing lookup stops
+being constant in history size.
+
+    python -m benchmarks.bench_user_loading
+"""
+import sys
+import time
+from datetime import datetime, timedelta
+from bson import ObjectId
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import Session, selectinload
+from bot.services.database import Base
+from bot.models.user_model import User
+from bot.models.wallet_model import Wallet
+from bot.models.cashflow_model import Cashflow
+from bot.models.loader_options import user_routing_options
+
+HISTORY_SIZES = [0, 100, 1_000, 10_000, 50_000]
+WALLETS_PER_USER = 3
+TELEGRAM_ID = 1
+
+
+def legacy_options():
+    """What lazy='selectin' on every relationship used to load."""
+    return (
+        selectinload(User.wallets).selectinload(Wallet.cashflows),
+        selectinload(User.cashflows).selectinload(Cashflow.wallet),
+    )
+
+
+def seed(engine, history_size):
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        user_id = str(ObjectId())
+        session.add(User(id=user_id, name='bench', username='bench', telegramId=TELEGRAM_ID))
+        wallet_ids = [str(ObjectId()) for _ in range(WALLETS_PER_USER)]
+        session.add_all([
+            Wallet(id=wallet_id, userId=user_id, name=f'wallet {i}', balance=0)
+            for i, wallet_id in enumerate(wallet_ids)
+        ])
+        session.flush()
+
+        start = datetime(2020, 1, 1)
+        rows = [
+            {
+                'id': str(ObjectId()),
+                'userId': user_id,
+                'walletId': wallet_ids[i % WALLETS_PER_USER],
+                'transactionDate': start + timedelta(hours=i),
+                'activityName': f'item {i}',
+                'flowType': 'expense',
+                'quantity': 1,
+                'price': 1000,
+                'total': 1000,
+                'isActive': True,
+            }
+            for i in range(history_size)
+        ]
+        if rows:
+            session.execute(Cashflow.__table__.insert(), rows)
+        session.commit()
+
+
+def measure(engine, options):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'after_cursor_execute', count)
+    try:
+        with Session(engine) as session:
+            started = time.perf_counter()
+            user = session.execute(
+                select(User).options(*options).where(User.telegramId == TELEGRAM_ID)
+            ).scalar_one()
+            elapsed = time.perf_counter() - started
+            # The identity map holds weak references, `user` keeps the graph alive.
+            rows = len(session.identity_map)
+            del user
+    finally:
+        event.remove(engine, 'after_cursor_execute', count)
+
+    return len(statements), rows, elapsed
+
+
+def main():
+    engine = create_engine('sqlite://')
+    baseline = None
+    failed = False
+
+    print(f"{'history':>8} | {'mode':<8} | {'queries':>7} | {'rows':>7} | {'ms':>8}")
+    for size in HISTORY_SIZES:
+        seed(engine, size)
+        for mode, options in (('routing', user_routing_options()), ('legacy', legacy_options())):
+            queries, rows, elapsed = measure(engine, options)
+            print(f'{size:>8} | {mode:<8} | {queries:>7} | {rows:>7} | {elapsed * 1000:>8.2f}')
+
+            if mode == 'routing':
+                baseline = baseline or (queries, rows)
+                if (queries, rows) != baseline:
+                    failed = True
+
+    if failed:
+        print('REGRESSION: routing lookup grows with history size')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+"""Query-plan regression check for cashflow date-range reads.
+
+Creates a scratch database on the MySQL/MariaDB server configured in .env
+(MYSQL_*), loads sql/initial_table.sql plus sql/migrations, seeds synthetic
+cashflow rows, then asserts that EXPLAIN for every hot query shape uses the
+expected composite index without a filesort. The scratch database is dropped
+at the end. Exits non-zero when a plan regresses.
+
+    python -m benchmarks.explain_cashflow_queries [rows]
+"""
+import sys
+import glob
+import random
+from datetime import datetime, timedelta
+import mysql.connector
+from sqlalchemy import table, column, select, String, DateTime, Boolean, Integer
+from sqlalchemy.dialects import mysql as mysql_dialect
+from constants import MYSQL_HOST, MYSQL_PORT, MYSQL_USER, MYSQL_PASSWORD
+from migrate import split_statements, apply_migration
+from bot.helpers.cashflow_filter import CashflowFilter
+
+SCRATCH_DATABASE = 'cashflow_explain_check'
+USERS = 200
+WALLETS_PER_USER = 3
+HEAVY_USER = 'heavyuser000000000000000'
+HEAVY_WALLET = 'heavywallet0000000000000'
+BATCH = 5000
+
+CASHFLOW = table(
+    'cashflow',
+    column('id', String),
+    column('userId', String),
+    column('walletId', String),
+    column('transactionDate', DateTime),
+    column('isActive', Boolean),
+    column('flowType', String),
+    column('categoryId', Integer),
+)
+
+
+def filter_query(cashflow_filter):
+    """SQL and params of the transaction list query for a CashflowFilter"""
+    query = (
+        select(CASHFLOW.c.id)
+        .where(*cashflow_filter.criteria(CASHFLOW.c))
+        .order_by(CASHFLOW.c.transactionDate.desc(), CASHFLOW.c.id.desc())
+    )
+    compiled = query.compile(dialect=mysql_dialect.dialect(), compile_kwargs={'render_postcompile': True})
+    return str(compiled), tuple(compiled.params[name] for name in compiled.positiontup)
+
+
+# (name, query, params, acceptable indexes)
+QUERIES = [
+    (
+        'get_cashflows_by_date_range',
+        """SELECT * FROM cashflow
+        WHERE userId = %s AND transactionDate BETWEEN %s AND %s AND isActive = TRUE
+        ORDER BY transactionDate DESC""",
+        (HEAVY_USER, datetime(2024, 1, 1), datetime(2024, 2, 1)),
+        {'idx_user_active_date'},
+    ),
+    (
+        'get_cashflows_by_wallet',
+        """SELECT * FROM cashflow
+        WHERE userId = %s AND walletId = %s AND isActive = TRUE
+        AND transactionDate BETWEEN %s AND %s
+        ORDER BY transactionDate DESC""",
+        (HEAVY_USER, HEAVY_WALLET, datetime(2024, 1, 1), datetime(2024, 2, 1)),
+        {'idx_user_wallet_date'},
+    ),
+    (
+        'get_cashflows_by_wallet (no range)',
+        """SELECT * FROM cashflow
+        WHERE userId = %s AND walletId = %s AND isActive = TRUE
+        ORDER BY transactionDate DESC""",
+        (HEAVY_USER, HEAVY_WALLET),
+        {'idx_user_wallet_date'},
+    ),
+    (
+        'transaction_controller list',
+        """SELECT * FROM cashflow
+        WHERE userId = %s AND isActive = 1
+        AND transactionDate >= %s AND transactionDate < %s
+        ORDER BY transactionDate DESC""",
+        (HEAVY_USER, datetime(2024, 1, 1), datetime(2024, 1, 8)),
+        {'idx_user_active_date'},
+    ),
+    (
+        'CashflowFilter date range',
+        *filter_query(CashflowFilter(HEAVY_USER, datetime(2024, 1, 1), datetime(2024, 1, 8))),
+        {'idx_user_active_date'},
+    ),
+    (
+        'CashflowFilter wallet + range',
+        *filter_query(CashflowFilter(
+            HEAVY_USER, datetime(2024, 1, 1), datetime(2024, 2, 1), wallet_ids=(HEAVY_WALLET,)
+        )),
+        {'idx_user_wallet_date'},
+    ),
+    (
+        'CashflowFilter flow type + range',
+        *filter_query(CashflowFilter(
+            HEAVY_USER, datetime(2024, 1, 1), datetime(2024, 2, 1), flow_types=('expense',)
+        )),
+        {'idx_user_active_date'},
+    ),
+]
+
+
+def seed(cursor, conn, rows):
+    start = datetime(2020, 1, 1)
+    heavy_rows = rows // 2
+
+    def generate():
+        for i in range(rows):
+            if i < heavy_rows:
+                user_id = HEAVY_USER
+                wallet_id = HEAVY_WALLET if i % WALLETS_PER_USER == 0 else f'hw{i % WALLETS_PER_USER:022d}'
+            else:
+                user = random.randrange(USERS)
+                user_id, wallet_id = f'u{user:023d}', f'w{user * WALLETS_PER_USER + i % WALLETS_PER_USER:023d}'
+            yield (
+                f'c{i:023d}', user_id, wallet_id,
+                start + timedelta(minutes=random.randrange(60 * 24 * 365 * 5)),
+                'bench', random.choice(['income', 'expense']), i % 50 != 0, 1000, 1000
+            )
+
+    batch = []
+    for row in generate():
+        batch.append(row)
+        if len(batch) == BATCH:
+            cursor.executemany(
+                """INSERT INTO cashflow
+                (id, userId, walletId, transactionDate, activityName, flowType, isActive, price, total)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)""", batch)
+            batch = []
+    if batch:
+        cursor.executemany(
+            """INSERT INTO cashflow
+            (id, userId, walletId, transactionDate, activityName, flowType, isActive, price, total)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)""", batch)
+    conn.commit()
+    cursor.execute('ANALYZE TABLE cashflow')
+    cursor.fetchall()
+
+
+def load_schema(cursor):
+    with open('sql/initial_table.sql', encoding='utf-8') as f:
+        schema = split_statements(f.read())
+    cashflow_ddl = [statement for statement in schema if statement.startswith('CREATE TABLE cashflow')]
+    for statement in cashflow_ddl:
+        cursor.execute(statement.replace('CREATE TABLE', 'CREATE TABLE IF NOT EXISTS', 1))
+
+    for path in sorted(glob.glob('sql/migrations/*.sql')):
+        apply_migration(cursor, path)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+
+    conn = mysql.connector.connect(
+        host=MYSQL_HOST, port=MYSQL_PORT, user=MYSQL_USER, password=MYSQL_PASSWORD
+    )
+    cursor = conn.cursor(dictionary=False)
+    cursor.execute(f'DROP DATABASE IF EXISTS {SCRATCH_DATABASE}')
+    cursor.execute(f'CREATE DATABASE {SCRATCH_DATABASE}')
+    cursor.execute(f'USE {SCRATCH_DATABASE}')
+
+    failures = []
+    try:
+        load_schema(cursor)
+        seed(cursor, conn, rows)
+
+        explain = conn.cursor(dictionary=True)
+        for name, query, params, expected in QUERIES:
+            explain.execute('EXPLAIN ' + query, params)
+            plan = explain.fetchall()[0]
+            extra = plan.get('Extra') or ''
+            ok = plan['key'] in expected and 'filesort' not in extra
+            print(f"{'OK  ' if ok else 'FAIL'} {name:<36} key={plan['key']} rows={plan['rows']} extra={extra}")
+            if not ok:
+                failures.append(name)
+    finally:
+        cursor.execute(f'DROP DATABASE IF EXISTS {SCRATCH_DATABASE}')
+        conn.close()
+
+    if failures:
+        print(f'Query plan regression: {", ".join(failures)}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
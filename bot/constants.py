@@ -18,20 +18,83 @@ S3_BUCKET = os.getenv('S3_BUCKET')
 
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 GEMINI_MODEL = os.getenv('GEMINI_MODEL')
+GEMINI_MODEL_LITE = os.getenv('GEMINI_MODEL_LITE', 'gemini-2.5-flash-lite')  # kosong = semua ke GEMINI_MODEL
 
 REDIS_HOST = os.getenv('REDIS_HOST')
 REDIS_PORT = os.getenv('REDIS_PORT')
 REDIS_PASSWORD = os.getenv('REDIS_PASSWORD')
 REDIS_DATABASE = os.getenv('REDIS_DATABASE')
 
+REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', 50))
+REDIS_SLOW_OPERATION_MS = float(os.getenv('REDIS_SLOW_OPERATION_MS', 20))
+
+CACHE_SERIALIZER = os.getenv('CACHE_SERIALIZER', 'msgpack')
+CACHE_COMPRESS_THRESHOLD = int(os.getenv('CACHE_COMPRESS_THRESHOLD', 1024))  # bytes
+CACHE_COMPRESS_LEVEL = int(os.getenv('CACHE_COMPRESS_LEVEL', 6))
+
 REDIS_TIME = int(os.getenv('REDIS_SAVE_TIME', 10))
 REDIS_CONTEXT_EXPIRED_TIME = int(os.getenv('REDIS_CONTEXT_EXPIRED_TIME', 2))
 REDIS_STATE_EXPIRED_TIME = int(os.getenv('REDIS_STATE_EXPIRED_TIME', 2))
 REDIS_SESSION_EXPIRED_TIME = int(os.getenv('REDIS_SESSION_EXPIRED_TIME', 2))
 
+PROFILE_CACHE_SIZE = int(os.getenv('PROFILE_CACHE_SIZE', 10000))
+PROFILE_CACHE_TTL = int(os.getenv('PROFILE_CACHE_TTL', 30))  # seconds, in-process tier
+PROFILE_CACHE_REDIS_TTL = int(os.getenv('PROFILE_CACHE_REDIS_TTL', 600))  # seconds
+
+BOT_CONCURRENT_UPDATES = int(os.getenv('BOT_CONCURRENT_UPDATES', 64))
+
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', 16))
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', 30))
+LLM_PARSE_RETRIES = int(os.getenv('LLM_PARSE_RETRIES', 1))  # extra calls when an answer fails validation
+LLM_DEBOUNCE_SECONDS = float(os.getenv('LLM_DEBOUNCE_SECONDS', 0.6))  # 0 disables fragment merging
+LLM_DEBOUNCE_MAX_FRAGMENTS = int(os.getenv('LLM_DEBOUNCE_MAX_FRAGMENTS', 5))
+
+LLM_BUDGET_WINDOW = int(os.getenv('LLM_BUDGET_WINDOW', 3600))  # seconds, sliding
+LLM_USER_TOKEN_BUDGET = int(os.getenv('LLM_USER_TOKEN_BUDGET', 30000))  # per user per window
+LLM_GLOBAL_TOKEN_BUDGET = int(os.getenv('LLM_GLOBAL_TOKEN_BUDGET', 3000000))  # all users per window
+LLM_BUDGET_HARD_RATIO = float(os.getenv('LLM_BUDGET_HARD_RATIO', 1.5))  # over budget: lite only; over budget x ratio: no LLM
+LLM_LITE_MAX_WORDS = int(os.getenv('LLM_LITE_MAX_WORDS', 20))
+LLM_METRICS_INTERVAL = int(os.getenv('LLM_METRICS_INTERVAL', 60))  # seconds
+
+GEMINI_CONTEXT_CACHE = os.getenv('GEMINI_CONTEXT_CACHE', 'true').lower() == 'true'
+GEMINI_CACHE_TTL = int(os.getenv('GEMINI_CACHE_TTL', 3600))  # seconds
+GEMINI_CACHE_REFRESH_MARGIN = int(os.getenv('GEMINI_CACHE_REFRESH_MARGIN', 300))  # extend TTL this long before expiry
+GEMINI_CACHE_RETRY = int(os.getenv('GEMINI_CACHE_RETRY', 1800))  # seconds before retrying a failed cache create
+# Smallest prompt Gemini accepts as cached content (2.5 Flash / Flash-Lite)
+GEMINI_CACHE_MIN_TOKENS = int(os.getenv('GEMINI_CACHE_MIN_TOKENS', 1024))
+
+LLM_RESPONSE_CACHE_TTL = int(os.getenv('LLM_RESPONSE_CACHE_TTL', 86400))  # seconds
+# Intents whose answer depends only on the message, not on the user or the date
+LLM_RESPONSE_CACHE_INTENTS = ['TANYA_WALLET', 'LAINNYA']
+
+INTENT_DATASET_DIR = os.getenv('INTENT_DATASET_DIR', 'datasets')
+INTENT_MODEL_PATH = os.getenv('INTENT_MODEL_PATH', 'models/intent_classifier.bin')
+INTENT_LOCAL_THRESHOLD = float(os.getenv('INTENT_LOCAL_THRESHOLD', 0.9))
+INTENT_LOCAL_INTENTS = ['TANYA_WALLET']
+INTENT_TRAIN_THREADS = int(os.getenv('INTENT_TRAIN_THREADS', os.cpu_count() or 1))
+
+CHART_WORKERS = int(os.getenv('CHART_WORKERS', 1))
+CHART_QUEUE_SIZE = int(os.getenv('CHART_QUEUE_SIZE', 8))  # jobs waiting or rendering
+CHART_TIMEOUT = float(os.getenv('CHART_TIMEOUT', 20))  # seconds per chart
+CHART_WIDTH = int(os.getenv('CHART_WIDTH', 800))
+CHART_HEIGHT = int(os.getenv('CHART_HEIGHT', 500))
+
+REPORT_CACHE_TTL = int(os.getenv('REPORT_CACHE_TTL', 3600))  # seconds
+REPORT_CACHE_MAX_BYTES = int(os.getenv('REPORT_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+REPORT_CACHE_MAX_ITEM_BYTES = int(os.getenv('REPORT_CACHE_MAX_ITEM_BYTES', 2 * 1024 * 1024))
+
+DIGEST_TIME = os.getenv('DIGEST_TIME', '06:00')  # HH:MM di DIGEST_TIMEZONE
+DIGEST_TIMEZONE = os.getenv('DIGEST_TIMEZONE', 'Asia/Jakarta')
+DIGEST_WEEKLY_DAY = int(os.getenv('DIGEST_WEEKLY_DAY', 1))  # format JobQueue: 0 = Minggu, 1 = Senin
+DIGEST_BATCH_SIZE = int(os.getenv('DIGEST_BATCH_SIZE', 500))  # users per grouped query
+DIGEST_SEND_RATE = float(os.getenv('DIGEST_SEND_RATE', 25))  # messages per second
+DIGEST_RENDER_CONCURRENCY = int(os.getenv('DIGEST_RENDER_CONCURRENCY', 2))
+DIGEST_CHARTS = os.getenv('DIGEST_CHARTS', 'true').lower() == 'true'
+
 BOT_RESPONSE_TO_REGISTER = 'Kamu belum daftar, daftar dulu dengan mengetik \"/register\"'
 BOT_RESPONSE_ERROR_SERVER = 'Ada kesalahan di server, ulangi lagi'
 BOT_RESPONSE_INTENT_NOT_FOUND = 'Perintah tidak dikenali.'
+BOT_RESPONSE_LLM_BUDGET = 'Batas pemakaian AI untuk saat ini sudah tercapai, coba lagi nanti ya.'
 BOT_RESPONSE_REGISTER_OK = '''👋 Selamat datang di Bot Pengatur Cashflow!
 
 Bot ini membantu kamu *mencatat dan memantau pemasukan, pengeluaran, dan transfer antar dompet*. 
@@ -58,25 +121,27 @@ Ketik *bantuan* kapan saja untuk melihat panduan.
 '''
 
 GEMINI_SYSTEM_INSTRUCTION_BASE_PHOTO = """
-cobalah untuk parse transaksi dari sebuah struck belanja dengan output seperti json dibawah ini, 
-jika terdapat beberapa item, kamu harus bisa menemukan wallet nya ya
+Kamu adalah asisten AI untuk bot cashflow. Gambar yang dikirim adalah struk belanja.
+Parse setiap item di struk menjadi transaksi dan jawab dengan satu objek JSON (tanpa ```json):
 
-```json
 {
   "intent": "CATAT_TRANSAKSI",
-  "content": [
+  "transactions": [
     {
-      "date": "2025-07-14 14:20:21",
+      "date": "2025-07-14 14:20:21",   // tanggal di struk, format YYYY-MM-DD HH:MM:SS
       "activityName": "nasi uduk",
       "quantity": 20,
-      "unit": "porsi",
-      "flowType": "income",          // flowType: income / expense / transfer
-      "itemType": "product",         // product / service
-      "price": 15000,                //price (angka, null jika tidak disebut)
-      "wallet": "cash"               //wallet (default: cash)
+      "unit": "porsi",                 // porsi, kg, layanan, unit, ...
+      "flowType": "expense",           // income / expense / transfer
+      "itemType": "product",           // product / service
+      "price": 15000,                  // harga satuan, null jika tidak terbaca
+      "wallet": "cash"                 // metode bayar di struk (gopay, bca, dana, ...), default cash
     }
   ]
 }
+
+Jika terdapat beberapa item, semuanya harus memakai wallet yang sama sesuai metode bayar di struk.
+Jika gambar bukan struk, jawab {"intent": "LAINNYA", "answer": "<jelaskan bahwa gambar tidak bisa dibaca sebagai struk>"}.
 """
 
 GEMINI_SYSTEM_INSTRUCTION_BASE = """
@@ -87,90 +152,84 @@ Klasifikasikan pesan pengguna ke salah satu intent berikut:
 - TANYA_WALLET
 - MINTA_LAPORAN
 - TAMBAH_WALLET
-- PINDAH WALLET
+- PINDAH_WALLET
 - LAINNYA
 
+Jawab dengan satu objek JSON (tanpa ```json). Field "intent" selalu diisi, lalu isi
+HANYA field milik intent tersebut; field lain dikosongkan (null):
+- CATAT_TRANSAKSI -> "transactions"
+- TAMBAH_WALLET   -> "wallet"
+- PINDAH_WALLET   -> "transfer"
+- MINTA_LAPORAN   -> "report"
+- LAINNYA         -> "answer"
+- TANYA_WALLET    -> tidak ada field tambahan
+
 Jika CATAT_TRANSAKSI
-Jika terdapat beberapa transaksi dalam satu kalimat, pecah menjadi beberapa item JSON
-```json
+Jika terdapat beberapa transaksi dalam satu kalimat, pecah menjadi beberapa item di "transactions"
 {
   "intent": "CATAT_TRANSAKSI",
-  "content": [
+  "transactions": [
     {
-      "date": "2025-07-14 14:20:21", //(kenali "hari ini", "kemarin", dst. Hari ini = {d})
+      "date": "2025-07-14 14:20:21", //(kenali "hari ini", "kemarin", dst. Hari ini = tanggal "Sekarang" di awal pesan)
       "activityName": "nasi uduk", // nasi goreng, ngegojek, narik gojek, gaji, dll
-      "quantity": 20, 
+      "quantity": 20,
       "unit": "porsi", //(misal: porsi, kg, layanan)
       "flowType": "income", // (income, expense, transfer)
       "itemType": "product", // product / service
-      "price": 15000,
+      "price": 15000, // null jika tidak disebut
       "wallet": "cash" // (gopay, bank bri, bca, dana, default: cash)
     }
   ]
 }
-```
 
 jika TANYA_WALLET
-```json
 {
-  "intent": "TANYA_WALLET",
-  "content": ""
+  "intent": "TANYA_WALLET"
 }
-```
 
 jika TAMBAH_WALLET:
-```json
 {
   "intent": "TAMBAH_WALLET",
-  "content": {
+  "wallet": {
     "name": "",           // nama wallet seperti Gopay, Dana, Bank BRI, Bank Mandiri, Cash, Bareksa
     "initialBalance": 0   // jika user tidak menyebutkan nominal, maka default 0
   }
 }
 
-```
-
 jika PINDAH_WALLET:
-```json
 {
   "intent": "PINDAH_WALLET",
-  "content": {
-    "targetWallet": "",
+  "transfer": {
     "sourceWallet": "",
+    "targetWallet": "",
     "nominal": 0,
-    "fee" : 0
+    "fee": 0
   }
 }
-```
 
 Jika MINTA_LAPORAN, dan waktu tidak disebut, gunakan:
-start = {d - 7 hari}, end = {d}
-```json
+start = {Sekarang - 7 hari}, end = {Sekarang}
 {
   "intent": "MINTA_LAPORAN",
-  "content": {
+  "report": {
     "dateRange": {
       "start": "2025-07-01 00:00:00",
       "end": "2025-07-22 00:00:00"
     },
-    "flowType": [],            // option=income,expense,transfer,[]
-    "wallet": "cash",                // atau null (semua wallet)
-    "groupBy": null,                 // option=day,week,month,flowType,null
-    "outputFormat": ['table]
+    "flowType": [],              // pilihan: income, expense, transfer; [] untuk semua
+    "wallet": "cash",            // atau null (semua wallet)
+    "groupBy": null,             // pilihan: day, week, month, atau null
+    "outputFormat": ["table"]    // array dari: table, pie, line (default table)
   }
 }
-```
 
-Jika kamu tidak yakin intent-nya, gunakan 
-```json
+Jika kamu tidak yakin intent-nya, gunakan
 {
   "intent": "LAINNYA",
-  "content": "(jawab secara normal dengan pengetahuanmu dan informasikan cara-cara input berdasarkan rule diatas, 
+  "answer": "(jawab secara normal dengan pengetahuanmu dan informasikan cara-cara input berdasarkan rule diatas,
   tapi harus tetap tau batasanmu bahwa kamu asisten ai cashflow untuk
   pencatatan cashflow)"
-
 }
-```
 """
 
 laporan = """
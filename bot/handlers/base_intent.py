@@ -1,76 +1,116 @@
 
+import asyncio
 import logging
 from telegram import Update
 from telegram.constants import ParseMode
 from telegram.ext import ContextTypes
-from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
 from bot.services.database import AsyncSessionLocal
 
-from bot.models.user_model import User
 from bot.models.intent_chat_model import Intent
 from bot.handlers.base import BaseHandler
 from bot.handlers.wallet import WalletHandler
 from bot.handlers.cashflow import CashflowHandler
+from bot.handlers.report import ReportHandler
 from bot.services.llm_model import LLMModel
 from bot.services.cache import CacheMessage
 from bot.services.image import ImageManager
-from bot.helpers.text_util import markdown_to_html, parse_json
+from bot.services.intent_classifier import IntentClassifier
+from bot.services.profile_cache import ProfileCache
+from bot.services.report import ReportEngine
+from bot.services.chart import ChartService
+from bot.services.report_cache import ReportCache
+from bot.services.response_cache import ResponseCache
+from bot.services.coalescer import MessageCoalescer
+from bot.services.token_budget import TokenBudgetExceeded
+from bot.helpers.text_util import markdown_to_html, normalize_message
 from bot.constants import (
     BOT_RESPONSE_TO_REGISTER,
     BOT_RESPONSE_ERROR_SERVER,
     BOT_RESPONSE_INTENT_NOT_FOUND,
+    BOT_RESPONSE_LLM_BUDGET,
     POSITIVE_KEYWORDS
 )
 
 logger = logging.getLogger(__name__)
 
 class BaseIntent(BaseHandler):
-    def __init__(self, llm_model: LLMModel, cache: CacheMessage, image_manager: ImageManager):
+    def __init__(self, llm_model: LLMModel, cache: CacheMessage, image_manager: ImageManager,
+                 intent_classifier: IntentClassifier, profile_cache: ProfileCache, chart_service: ChartService):
         self.llm_model = llm_model
         self.cache = cache
         self.image_manager = image_manager
-        self.cashflow_handler = CashflowHandler(self.llm_model, self.cache)
-        self.wallet_handler = WalletHandler(self.llm_model, self.cache)
+        self.intent_classifier = intent_classifier
+        self.profile_cache = profile_cache
+        self.response_cache = ResponseCache(self.cache)
+        self.coalescer = MessageCoalescer()
+        self.cashflow_handler = CashflowHandler(self.llm_model, self.cache, self.profile_cache)
+        self.wallet_handler = WalletHandler(self.llm_model, self.cache, self.profile_cache)
+        self.report_handler = ReportHandler(self.cache, ReportEngine(), chart_service, ReportCache(self.cache))
 
     async def handle_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         telegram_user = update.effective_user
         message = update.message.text
 
-        user_state = self.cache.get_state(telegram_user.id)
+        user_state = await self.cache.get_state(telegram_user.id)
+        if (user_state and user_state.get('intent') == 'CATAT_TRANSAKSI'
+                and self.cashflow_handler.missing_price(user_state['content'])):
+            await self.cashflow_handler.fill_price(update, context, user_state)
+            return
+
         if user_state:
-            if message in POSITIVE_KEYWORDS:
-                user_state['content']['answer'] = True
-            else:
-                user_state['content']['answer'] = False
+            answer = message in POSITIVE_KEYWORDS
+            rev = await self.cache.update_state(
+                telegram_user.id, {'answer': answer}, expected_rev=user_state['rev'])
+
+            if not rev:
+                logger.info(f'State changed concurrently, skip | {telegram_user.id} | {message}')
+                return
 
-            self.cache.save_state(telegram_user.id, user_state)
+            user_state['answer'] = answer
+            user_state['rev'] = rev
             await self._route_intent(user_state, update, context)
-            return 
+            return
 
-        user = await self._get_user(telegram_user.id)
+        user = await self.profile_cache.get(telegram_user.id)
 
         if not user:
             await update.message.reply_text(BOT_RESPONSE_TO_REGISTER)
             return
 
-        try:
-            chat = self.llm_model.create_base_chat_model()
+        # Fragments typed in quick succession are answered as one message
+        message = await self.coalescer.debounce(telegram_user.id, message)
+        if message is None:
+            return
 
-            response = chat.send_message(message)
-            response = self._build_response(response)
+        try:
+            response, first = await self.coalescer.single_flight(
+                (telegram_user.id, normalize_message(message)), lambda: self._resolve_intent(message, user['id']))
+            if not first:
+                logger.info(f'Duplicate of an in-flight message, skip | {telegram_user.id} | {message}')
+                return
 
-            response['user'] = self._format_user_data(user)
+            response = {**response, 'user': user}
 
             logger.info(f'{response["intent"]} | {telegram_user.id} | {message}')
 
-            self.cache.save_state(telegram_user.id, response)
+            await self.cache.save_state(telegram_user.id, response)
             await self._save_intent(message, response)
             await self._route_intent(response, update, context)
 
-        except ValueError:
+        except TokenBudgetExceeded:
+            await update.message.reply_text(BOT_RESPONSE_LLM_BUDGET)
+        except (ValueError, asyncio.TimeoutError):
             await update.message.reply_text(BOT_RESPONSE_ERROR_SERVER)
 
+    async def _resolve_intent(self, message: str, user_id: str) -> dict:
+        response = self.intent_classifier.classify(message)
+        if not response:
+            response = await self.response_cache.get(message)
+        if not response:
+            response = await self.llm_model.classify_message(message, user_id)
+            await self.response_cache.put(message, response)
+        return response
+
     async def handle_photo(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         telegram_user = update.effective_user
 
@@ -78,7 +118,7 @@ class BaseIntent(BaseHandler):
             await update.message.reply_text('Foto tidak masuk, tolong ulangi foto lagi')
             return
 
-        user = await self._get_user(telegram_user.id)
+        user = await self.profile_cache.get(telegram_user.id)
 
         if not user:
             await update.message.reply_text(BOT_RESPONSE_TO_REGISTER)
@@ -89,25 +129,23 @@ class BaseIntent(BaseHandler):
 
         file_bytes = await file.download_as_bytearray()
 
-        response = self.llm_model.parse_context_image(file_bytes)
-        response = self._build_response(response)
+        try:
+            response = await self.llm_model.classify_image(file_bytes, user['id'])
+        except TokenBudgetExceeded:
+            await update.message.reply_text(BOT_RESPONSE_LLM_BUDGET)
+            return
+        except (ValueError, asyncio.TimeoutError):
+            await update.message.reply_text(BOT_RESPONSE_ERROR_SERVER)
+            return
 
         logger.info(f' {response["intent"]} | {telegram_user.id} | By photo input')
 
-        response['user'] = self._format_user_data(user)
+        response['user'] = user
 
-        self.cache.save_state(telegram_user.id, response)
+        await self.cache.save_state(telegram_user.id, response)
         await self._save_intent('photo', response)
         await self._route_intent(response, update, context)
 
-    def _build_response(self, response):
-        input_token = response.usage_metadata.prompt_token_count
-        output_token = response.usage_metadata.candidates_token_count
-        response = parse_json(response.text)
-        response['inputToken'] = input_token
-        response['outputToken'] = output_token
-        return response
-
     async def _save_intent(self, message: str, response: dict):
         async with AsyncSessionLocal() as session:
             new_intent = Intent(
@@ -122,46 +160,25 @@ class BaseIntent(BaseHandler):
             session.add(new_intent)
             await session.commit()
 
-    async def _get_user(self, telegram_id: int) -> User:
-        async with AsyncSessionLocal() as session:
-            result = await session.execute(
-                select(User)
-                .options(selectinload(User.wallets))
-                .where(User.telegramId == telegram_id)
-            )
-            return result.scalar_one_or_none()
-
-    def _format_user_data(self, user: User) -> dict:
-        return {
-            'id': user.id,
-            'username': user.username,
-            'telegramId': user.telegramId,
-            'wallets': [
-                {'id': wallet.id, 'name': wallet.name, 'balance': float(wallet.balance)}
-                for wallet in user.wallets if wallet.isActive
-            ]
-        }
-
     async def _route_intent(self, response, update: Update, context: ContextTypes.DEFAULT_TYPE):
         intent = response['intent']
 
         if intent == 'TANYA_WALLET':
-            await self.wallet_handler.wallet_balance(update, context)
+            await self.wallet_handler.wallet_balance(update, context, response)
         elif intent == 'CATAT_TRANSAKSI':
-            await self.cashflow_handler.input_cashflow_by_text(update, context)
+            await self.cashflow_handler.input_cashflow_by_text(update, context, response)
         elif intent == 'TAMBAH_WALLET':
-            await self.wallet_handler.add_wallet_from_intent(update, context)
+            await self.wallet_handler.add_wallet_from_intent(update, context, response)
         elif intent == 'MINTA_LAPORAN':
-            await update.message.reply_text(str(response['content']))
-            self.cache.clear_user_data(update.effective_user.id)
+            await self.report_handler.report_from_intent(update, context, response)
         elif intent == 'PINDAH_WALLET':
             await update.message.reply_text(str(response['content']))
-            self.cache.clear_user_data(update.effective_user.id)
+            await self.cache.clear_user_data(update.effective_user.id)
         elif intent == 'LAINNYA':
             await update.message.reply_text(
                 markdown_to_html(response['content']), 
                 parse_mode=ParseMode.HTML
             )
-            self.cache.clear_user_data(update.effective_user.id)
+            await self.cache.clear_user_data(update.effective_user.id)
         else:
             await update.message.reply_text(BOT_RESPONSE_INTENT_NOT_FOUND)
@@ -6,31 +6,68 @@ from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import ContextTypes
 from bot.handlers.base import BaseHandler
 
-from sqlalchemy.future import select
+from sqlalchemy import insert, update
 from bot.services.database import AsyncSessionLocal
 from bot.services.llm_model import LLMModel
 from bot.services.cache import CacheMessage
+from bot.services.profile_cache import ProfileCache
+from bot.services.rollup import apply_rollup
 from bot.models.cashflow_model import Cashflow
 from bot.models.wallet_model import Wallet
 from bot.helpers.output_messages import render_grouped_table
 from bot.helpers.date_util import string_to_datetime
+from bot.helpers.text_util import parse_nominal
 
 logger = logging.getLogger(__name__)
 
 
 class CashflowHandler(BaseHandler):
-    def __init__(self, llm_model: LLMModel, cache: CacheMessage):
+    def __init__(self, llm_model: LLMModel, cache: CacheMessage, profile_cache: ProfileCache):
         self.llm_model = llm_model
         self.cache = cache
+        self.profile_cache = profile_cache
 
     @staticmethod
     def calculate_total(row: dict) -> Decimal:
-        return Decimal(row['price']) * Decimal(row['quantity'])
+        if row.get('price') is None:
+            raise ValueError(f'Price missing for {row.get("activityName")}')
+        return Decimal(str(row['price'])) * Decimal(str(row['quantity']))
 
-    async def input_cashflow_by_text(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    @staticmethod
+    def missing_price(rows: list):
+        """First row whose price the user did not mention, or None."""
+        return next((row for row in rows if row.get('price') is None), None)
+
+    async def fill_price(self, update: Update, context: ContextTypes.DEFAULT_TYPE, state: dict):
+        """Take the user's reply as the price of the first row without one."""
         telegram_user = update.effective_user
+        row = self.missing_price(state['content'])
+
+        price = parse_nominal(update.message.text)
+        if price is None:
+            await update.message.reply_text(f'💰 Harga {row["activityName"]} berapa? Balas dengan angka, misal 15000.')
+            return
 
-        state = self.cache.get_context(telegram_user.id)
+        row['price'] = price
+        rev = await self.cache.update_state(
+            telegram_user.id, {'content': state['content']}, expected_rev=state['rev'])
+        if not rev:
+            logger.info(f'State changed concurrently, skip price | {telegram_user.id}')
+            return
+
+        state['rev'] = rev
+        await self.input_cashflow_by_text(update, context, state)
+
+    async def input_cashflow_by_text(self, update: Update, context: ContextTypes.DEFAULT_TYPE, state: dict = None):
+        telegram_user = update.effective_user
+
+        state = state or await self.cache.get_state(telegram_user.id)
+
+        # Ask for prices the message did not mention before offering to save
+        row = self.missing_price(state['content'])
+        if row:
+            await update.message.reply_text(f'💰 Harga {row["activityName"]} berapa? Balas dengan angka, misal 15000.')
+            return
 
         keyboard = [
                 [
@@ -49,7 +86,15 @@ class CashflowHandler(BaseHandler):
 
         telegram_user = update.effective_user
 
-        state = self.cache.get_context(telegram_user.id)
+        state = await self.cache.get_state(telegram_user.id)
+
+        # Claim the pending transaction so a double tap cannot save it twice:
+        # a tap that read the state before the claim fails the rev check, one
+        # that read it after sees `confirmed` already set.
+        if not state or state.get('confirmed') or not await self.cache.update_state(
+                telegram_user.id, {'confirmed': query.data}, expected_rev=state['rev']):
+            await query.edit_message_text('⌛ Transaksi sudah diproses atau kedaluwarsa.')
+            return
 
         wallet_use, wallet_id = state['content'][0]['wallet'], None
 
@@ -60,47 +105,50 @@ class CashflowHandler(BaseHandler):
 
         if not wallet_id:
             await query.edit_message_text('❌ Sepertinya wallet yang kamu sebutkan salah.')
+            await self.cache.clear_state(telegram_user.id)
             return
 
         try:
             if query.data == 'cashflow_yes':
                 total_amount = Decimal('0.00')
-
+                rows = []
+
+                for row in state['content']:
+                    row_total = self.calculate_total(row)
+
+                    rows.append({
+                        'id': str(ObjectId()),
+                        'userId': state['user']['id'],
+                        'walletId': wallet_id,
+                        'transactionDate': string_to_datetime(row['date']),
+                        'activityName': row['activityName'],
+                        'description': '',
+                        'categoryId': 1,
+                        'quantity': row['quantity'],
+                        'unit': row['unit'],
+                        'flowType': row['flowType'],
+                        'price': row['price'],
+                        'total': row_total,
+                    })
+
+                    if row['flowType'] == 'income':
+                        total_amount -= row_total
+                    if row['flowType'] == 'expense':
+                        total_amount += row_total
+
+                # Rows, daily rollup and wallet balance commit together
                 async with AsyncSessionLocal() as session:
                     async with session.begin():
-                        for row in state['content']:
-
-                            row_total = Decimal(row['price']) * Decimal(row['quantity'])
-                            
-                            cashflow = Cashflow(
-                                id=str(ObjectId()),
-                                userId=state['user']['id'],
-                                walletId=wallet_id,
-                                transactionDate=string_to_datetime(row['date']),
-                                activityName=row['activityName'],
-                                description='',
-                                categoryId=1,
-                                quantity=row['quantity'],
-                                unit=row['unit'],
-                                flowType=row['flowType'],
-                                price=row['price'],
-                                total=row_total,
-                            )
-
-                            session.add(cashflow)
-
-                            if row['flowType'] == 'income':
-                                total_amount -= row_total
-                            if row['flowType'] == 'expense':
-                                total_amount += row_total
-
-                        result = await session.execute(select(Wallet).where(Wallet.id == wallet_id))
-                        wallet = result.scalar_one_or_none()
-                        if wallet:
-                            wallet.balance = wallet.balance - total_amount
-                            await session.flush()
-                    await session.commit()
-
+                        await session.execute(insert(Cashflow), rows)
+                        await apply_rollup(session, rows)
+                        await session.execute(
+                            update(Wallet)
+                            .where(Wallet.id == wallet_id)
+                            .values(balance=Wallet.balance - total_amount)
+                        )
+
+                await self.profile_cache.invalidate(telegram_user.id)
+                await self.cache.bump_data_version(state['user']['id'])
                 await query.edit_message_text('✅ Transaksi telah disimpan')
             elif query.data == 'cashflow_no':
                 await query.edit_message_text('🚫 Transaksi dibatalkan. Silakan prompt ulang')
@@ -108,8 +156,8 @@ class CashflowHandler(BaseHandler):
         except Exception as e:
             logger.error(f'Error handling confirmation: {e}')
             await query.edit_message_text('❌ Terjadi kesalahan saat memproses konfirmasi.')
-            self.cache.clear_context(telegram_user.id)
+            await self.cache.clear_state(telegram_user.id)
             return
 
-        self.cache.clear_context(telegram_user.id)
+        await self.cache.clear_state(telegram_user.id)
         logger.info(f'Success, clear cache {telegram_user.id}')
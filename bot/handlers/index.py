@@ -5,7 +5,6 @@ from telegram import Update
 from telegram.ext import ContextTypes
 from bot.handlers.base import BaseHandler
 
-from sqlalchemy.future import select
 from bot.services.database import AsyncSessionLocal
 from bot.models.user_model import User
 from bot.constants import (
@@ -17,35 +16,25 @@ logger = logging.getLogger(__name__)
 class IndexHandler(BaseHandler):
     async def help(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         tg_user = update.effective_user
-        async with AsyncSessionLocal() as session:
-            result = await session.execute(
-                select(User).where(User.telegramId == tg_user.id)
-            )
-            user = result.scalar_one_or_none()
+        user = await self.profile_cache.get(tg_user.id)
 
         if user:
-            logger.info(f'User {user.username} hit /start')
-            await update.message.reply_text(f'Halo {user.username}')
+            logger.info(f'User {user["username"]} hit /start')
+            await update.message.reply_text(f'Halo {user["username"]}')
         else:
-            logger.info(f'Not registered: {user.username}')
+            logger.info(f'Not registered: {tg_user.username}')
             await update.message.reply_text('Kamu belum daftar, daftar dulu dengan mengetik \"/register\"')
 
     async def register(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         telegram_user = update.effective_user
 
-        async with AsyncSessionLocal() as session:
-            result = await session.execute(
-                select(User).where(
-                    User.telegramId == telegram_user.id,
-                    User.isActive == True
-                )
-            )
-            existing_user = result.scalars().first()
+        existing_user = await self.profile_cache.get(telegram_user.id)
+
+        if existing_user and existing_user['isActive']:
+            await update.message.reply_text('Kamu sudah terdaftar dan aktif.')
+            return
 
-            if existing_user:
-                await update.message.reply_text('Kamu sudah terdaftar dan aktif.')
-                return
-                
+        async with AsyncSessionLocal() as session:
             new_user = User(
                 id=str(ObjectId()),
                 name=telegram_user.full_name,
@@ -55,6 +44,7 @@ class IndexHandler(BaseHandler):
 
             session.add(new_user)
             await session.commit()
+            await self.profile_cache.invalidate(telegram_user.id)
             await update.message.reply_text('Registrasi berhasil! 🎉')
             
         await update.message.reply_text(f'Halo: {telegram_user.username}')
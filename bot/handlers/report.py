@@ -0,0 +1,86 @@
+
+import logging
+from telegram import Update
+from telegram.error import BadRequest
+from telegram.ext import ContextTypes
+from bot.handlers.base import BaseHandler
+
+from bot.services.cache import CacheMessage
+from bot.services.report import ReportEngine, ReportError
+from bot.services.chart import ChartService, ChartError, CHART_FORMATS, report_figure
+from bot.services.report_cache import ReportCache
+from bot.helpers.output_messages import render_report
+from bot.constants import BOT_RESPONSE_ERROR_SERVER
+
+logger = logging.getLogger(__name__)
+
+
+class ReportHandler(BaseHandler):
+    def __init__(self, cache: CacheMessage, report_engine: ReportEngine, chart_service: ChartService,
+                 report_cache: ReportCache):
+        self.cache = cache
+        self.report_engine = report_engine
+        self.chart_service = chart_service
+        self.report_cache = report_cache
+
+    async def report_from_intent(self, update: Update, context: ContextTypes.DEFAULT_TYPE, state: dict = None):
+        telegram_user = update.effective_user
+        state = state or await self.cache.get_state(telegram_user.id)
+
+        user, content = state['user'], state['content'] or {}
+        output_formats = content.get('outputFormat') or []
+        if isinstance(output_formats, str):
+            output_formats = [output_formats]
+        charts = [kind for kind in output_formats if kind in CHART_FORMATS]
+
+        try:
+            digest = await self.report_cache.digest(user['id'], self.report_engine.report_spec(user, content))
+
+            if 'table' in output_formats or not charts:
+                text = await self._report_text(digest, user, content)
+                await update.message.reply_text(text, parse_mode='Markdown')
+
+            if charts:
+                await self._send_charts(update, digest, user, content, charts)
+        except (ReportError, ChartError) as error:
+            await update.message.reply_text(f'❌ {error}')
+        except Exception as error:
+            logger.error(f'Error building report for {telegram_user.id}: {error}')
+            await update.message.reply_text(BOT_RESPONSE_ERROR_SERVER)
+
+        await self.cache.clear_state(telegram_user.id)
+
+    async def _report_text(self, digest: str, user: dict, content: dict) -> str:
+        cached = await self.report_cache.get(digest, 'text')
+        if cached is not None:
+            return cached.decode()
+
+        text = render_report(await self.report_engine.summarize(user, content))
+        await self.report_cache.put(digest, 'text', text.encode())
+        return text
+
+    async def _send_charts(self, update: Update, digest: str, user: dict, content: dict, charts: list):
+        frame = None
+
+        for kind in charts:
+            # Same chart already uploaded: let Telegram reuse its copy
+            file_id = await self.report_cache.get(digest, f'file:{kind}')
+            if file_id is not None:
+                try:
+                    await update.message.reply_photo(photo=file_id.decode())
+                    continue
+                except BadRequest as error:
+                    logger.info(f'Cached file_id rejected, uploading again: {error}')
+
+            png = await self.report_cache.get(digest, f'png:{kind}')
+            if png is None:
+                if frame is None:
+                    frame, start, end = await self.report_engine.cashflow_frame(user, content)
+                    flow_types = self.report_engine.flow_types(content.get('flowType'))
+
+                figure = report_figure(kind, frame, start, end, (flow_types or ['expense'])[0], content.get('groupBy'))
+                png = await self.chart_service.render(figure)
+                await self.report_cache.put(digest, f'png:{kind}', png)
+
+            message = await update.message.reply_photo(photo=png)
+            await self.report_cache.put(digest, f'file:{kind}', message.photo[-1].file_id.encode())
@@ -8,6 +8,7 @@ from bot.handlers.base import BaseHandler
 from bot.services.database import AsyncSessionLocal
 from bot.services.llm_model import LLMModel
 from bot.services.cache import CacheMessage
+from bot.services.profile_cache import ProfileCache
 from bot.models.wallet_model import Wallet
 from bot.helpers.output_messages import render_wallet_summary
 
@@ -15,19 +16,20 @@ logger = logging.getLogger(__name__)
 
 
 class WalletHandler(BaseHandler):
-    def __init__(self, llm_model: LLMModel, cache: CacheMessage):
+    def __init__(self, llm_model: LLMModel, cache: CacheMessage, profile_cache: ProfileCache):
         self.llm_model = llm_model
         self.cache = cache
+        self.profile_cache = profile_cache
 
-    async def wallet_balance(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    async def wallet_balance(self, update: Update, context: ContextTypes.DEFAULT_TYPE, state: dict = None):
         telegram_user = update.effective_user
-        state = self.cache.get_context(telegram_user.id)
-        self.cache.clear_context(telegram_user.id)
+        state = state or await self.cache.get_state(telegram_user.id)
+        await self.cache.clear_state(telegram_user.id)
         await update.message.reply_text(render_wallet_summary(state['user']['wallets']), parse_mode='Markdown')
 
-    async def add_wallet_from_intent(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    async def add_wallet_from_intent(self, update: Update, context: ContextTypes.DEFAULT_TYPE, state: dict = None):
         telegram_user = update.effective_user
-        state = self.cache.get_context(telegram_user.id)
+        state = state or await self.cache.get_state(telegram_user.id)
 
         wallet_name_to_add = state['content']['name']
         wallet_nominal_to_add = state['content']['initialBalance']
@@ -37,12 +39,12 @@ class WalletHandler(BaseHandler):
                 await update.message.reply_text(f'Wallet {wallet_name_to_add} sudah ada')
                 return
 
-        if 'answer' not in state['content']:
+        if state.get('answer') is None:
             await update.message.reply_text(
                 f'Kamu ingin menambahkan {wallet_name_to_add} dengan nominal {wallet_nominal_to_add}?')
             return
 
-        if state['content']['answer']:
+        if state['answer']:
             try:
                 async with AsyncSessionLocal() as session:
                     session.add(Wallet(
@@ -52,11 +54,13 @@ class WalletHandler(BaseHandler):
                         balance=wallet_nominal_to_add
                     ))
                     await session.commit()
-                    await update.message.reply_text(f'✅ Wallet {wallet_name_to_add} berhasil ditambahkan!')
+                await self.profile_cache.invalidate(telegram_user.id)
+                await self.cache.bump_data_version(state['user']['id'])
+                await update.message.reply_text(f'✅ Wallet {wallet_name_to_add} berhasil ditambahkan!')
             except Exception as error:
                 logger.warning(f'Error adding wallet for {telegram_user.id}: {str(error)}')
                 await update.message.reply_text(f'🙏🏻 Maaf, terjadi kesalahan, silakan ulangi prompt')
         else:
             await update.message.reply_text(f'Baiklah')
 
-        self.cache.clear_context(telegram_user.id)
+        await self.cache.clear_state(telegram_user.id)
@@ -0,0 +1,156 @@
+import json
+import hashlib
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta
+from typing import Optional
+from bot.helpers.date_util import string_to_datetime
+
+FLOW_TYPES = ('income', 'expense', 'transfer')
+
+DEFAULT_RANGE_DAYS = 7
+
+
+class FilterError(ValueError):
+    """Filter values that cannot describe any cashflow query."""
+
+
+def parse_flow_types(flow_types) -> tuple:
+    """Known flow types from a string or list, unknown values are dropped."""
+    if isinstance(flow_types, str):
+        flow_types = [flow_types]
+    return tuple(flow_type for flow_type in flow_types or [] if flow_type in FLOW_TYPES)
+
+
+def _is_midnight(moment: Optional[datetime]) -> bool:
+    return moment is not None and moment.time() == datetime.min.time()
+
+
+@dataclass(frozen=True)
+class CashflowFilter:
+    """Which cashflow rows a list, export or report reads.
+
+    `start` is inclusive and `end` exclusive so both compile to plain range
+    comparisons on transactionDate, which MySQL can serve from the
+    (userId, isActive, transactionDate) or (userId, walletId, transactionDate)
+    indexes. Nothing here wraps a column in a function.
+    """
+    user_id: str
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    flow_types: tuple = ()
+    wallet_ids: tuple = ()
+    category_id: Optional[int] = None
+
+    def __post_init__(self):
+        unknown = set(self.flow_types) - set(FLOW_TYPES)
+        if unknown:
+            raise FilterError(f'Unknown flow type: {", ".join(sorted(unknown))}')
+        if self.start and self.end and self.start >= self.end:
+            raise FilterError('start must be before end')
+
+        # Same filter, same key, whatever order the values came in
+        object.__setattr__(self, 'flow_types', tuple(sorted(set(self.flow_types), key=FLOW_TYPES.index)))
+        object.__setattr__(self, 'wallet_ids', tuple(sorted(set(self.wallet_ids))))
+
+    @classmethod
+    def from_request_args(cls, user_id: str, args) -> 'CashflowFilter':
+        """start_date / end_date (YYYY-MM-DD, end day included), category,
+        flow_type and wallet_id query args. Malformed values are ignored."""
+        start = end = category_id = None
+        try:
+            start = datetime.strptime(args.get('start_date', ''), '%Y-%m-%d')
+        except ValueError:
+            pass
+        try:
+            end = datetime.strptime(args.get('end_date', ''), '%Y-%m-%d') + timedelta(days=1)
+        except ValueError:
+            pass
+        try:
+            category_id = int(args.get('category', ''))
+        except ValueError:
+            pass
+
+        wallet_id = args.get('wallet_id')
+        return cls(
+            user_id=user_id,
+            start=start,
+            end=end,
+            flow_types=parse_flow_types(args.get('flow_type')),
+            wallet_ids=(wallet_id,) if wallet_id else (),
+            category_id=category_id,
+        )
+
+    @classmethod
+    def from_report_content(cls, user_id: str, content: dict, wallet_ids, now: datetime = None) -> 'CashflowFilter':
+        """MINTA_LAPORAN dateRange and flowType; the wallet name is resolved
+        by the caller. Without a range the last DEFAULT_RANGE_DAYS are used."""
+        date_range = content.get('dateRange') or {}
+
+        end = date_range.get('end')
+        # Whole minutes so repeated requests resolve to the same range
+        end = string_to_datetime(end) if end else (now or datetime.now()).replace(second=0, microsecond=0)
+        start = date_range.get('start')
+        start = string_to_datetime(start) if start else end - timedelta(days=DEFAULT_RANGE_DAYS)
+
+        # "sampai 22 Juli" comes as 2025-07-22 00:00:00, include that whole day
+        if _is_midnight(end):
+            end += timedelta(days=1)
+
+        return cls(
+            user_id=user_id,
+            start=start,
+            end=end,
+            flow_types=parse_flow_types(content.get('flowType')),
+            wallet_ids=tuple(wallet_ids),
+        )
+
+    @property
+    def whole_days(self) -> bool:
+        """Both bounds on midnight, so cashflow_daily_rollup can answer it."""
+        return _is_midnight(self.start) and _is_midnight(self.end) and self.category_id is None
+
+    def criteria(self, model) -> list:
+        """WHERE clauses for a cashflow table (ORM model or table.c)."""
+        clauses = [model.userId == self.user_id, model.isActive == True]
+        if self.start:
+            clauses.append(model.transactionDate >= self.start)
+        if self.end:
+            clauses.append(model.transactionDate < self.end)
+        clauses.extend(self._common_criteria(model))
+        if self.category_id is not None:
+            clauses.append(model.categoryId == self.category_id)
+        return clauses
+
+    def rollup_criteria(self, model) -> list:
+        """WHERE clauses for cashflow_daily_rollup, only valid for whole_days."""
+        if not self.whole_days:
+            raise FilterError('Rollup rows only cover whole days without a category')
+        clauses = [model.userId == self.user_id, model.count > 0]
+        if self.start:
+            clauses.append(model.day >= self.start.date())
+        if self.end:
+            clauses.append(model.day < self.end.date())
+        clauses.extend(self._common_criteria(model))
+        return clauses
+
+    def _common_criteria(self, model) -> list:
+        clauses = []
+        if len(self.wallet_ids) == 1:
+            clauses.append(model.walletId == self.wallet_ids[0])
+        elif self.wallet_ids:
+            clauses.append(model.walletId.in_(self.wallet_ids))
+        if self.flow_types:
+            clauses.append(model.flowType.in_(self.flow_types))
+        return clauses
+
+    def as_dict(self) -> dict:
+        spec = asdict(self)
+        for bound in ('start', 'end'):
+            spec[bound] = spec[bound].isoformat() if spec[bound] else None
+        spec['flow_types'] = list(self.flow_types)
+        spec['wallet_ids'] = list(self.wallet_ids)
+        return spec
+
+    def cache_key(self) -> str:
+        payload = json.dumps(self.as_dict(), sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(payload.encode()).hexdigest()
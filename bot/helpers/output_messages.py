@@ -1,4 +1,5 @@
 from collections import defaultdict
+from datetime import timedelta
 from decimal import Decimal
 
 def render_grouped_table(data):
@@ -19,9 +20,11 @@ def render_grouped_table(data):
         result += f"| {'Item':<18} | {'Qty':>3} | {'Harga':>8} | {'Subtotal':>8} |\n"
         result += f"|{'-'*20}|{'-'*5}|{'-'*10}|{'-'*10}|\n"
         for d in transaksi:
-            quantity = d.get("quantity", 0)
-            price = d.get("price", 0)
-            total = quantity * price
+            quantity = d.get("quantity") or 0
+            price = d.get("price")
+            # Price not mentioned yet, the user is asked for it
+            total = quantity * price if price is not None else '-'
+            price = price if price is not None else '-'
             flow_label = '(i)' if d.get('flowType') == 'income' else '(o)' if d.get('flowType') == 'expense' else ''
             
             raw_name = d.get("activityName", "")
@@ -55,3 +58,51 @@ def render_wallet_summary(wallets):
     result += f"| {'TOTAL':<15} | {total_balance:>15,.2f} |\n"
     result += "```\n"
     return result
+
+FLOW_LABELS = {'income': 'Masuk', 'expense': 'Keluar', 'transfer': 'Transfer'}
+PERIOD_LABELS = {'day': 'hari', 'week': 'minggu', 'month': 'bulan'}
+
+def _pivot_flows(rows, key):
+    pivot = defaultdict(lambda: defaultdict(Decimal))
+    for row in rows:
+        pivot[row[key]][row['flowType']] += row['total']
+    return pivot
+
+def _render_flow_table(title, pivot, flows):
+    result = "```text\n"
+    result += f"| {title:<10} |" + "".join(f" {FLOW_LABELS[flow]:>11} |" for flow in flows) + "\n"
+    result += f"|{'-'*12}|" + "".join(f"{'-'*13}|" for _ in flows) + "\n"
+    totals = defaultdict(Decimal)
+    for label, values in pivot.items():
+        label = str(label)
+        if len(label) > 10:
+            label = label[:9] + "…"
+        result += f"| {label:<10} |" + "".join(f" {values[flow]:>11,.0f} |" for flow in flows) + "\n"
+        for flow in flows:
+            totals[flow] += values[flow]
+    result += f"|{'-'*12}|" + "".join(f"{'-'*13}|" for _ in flows) + "\n"
+    result += f"| {'TOTAL':<10} |" + "".join(f" {totals[flow]:>11,.0f} |" for flow in flows) + "\n"
+    result += "```\n"
+    return result
+
+def render_report(report):
+    rows = report['rows']
+    start = report['start'].strftime('%Y-%m-%d')
+    end = (report['end'] - timedelta(seconds=1)).strftime('%Y-%m-%d')
+
+    result = f"📊 Laporan {start} s/d {end}\n\n"
+    if not rows:
+        return result + "Tidak ada data transaksi."
+
+    flows = [flow for flow in FLOW_LABELS if any(row['flowType'] == flow for row in rows)]
+    count = sum(row['count'] for row in rows)
+
+    if report['groupBy']:
+        result += f"Per {PERIOD_LABELS[report['groupBy']]}:\n"
+        result += _render_flow_table('Periode', _pivot_flows(rows, 'period'), flows)
+        result += "\n"
+
+    result += "Per wallet:\n"
+    result += _render_flow_table('Wallet', _pivot_flows(rows, 'wallet'), flows)
+    result += f"\nJumlah transaksi: {count}\n"
+    return result
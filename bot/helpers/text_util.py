@@ -1,11 +1,5 @@
 
 import re
-import json
-
-def parse_json(text):
-    """Parse JSON from Gemini response, handling code blocks."""
-    clean_text = re.sub(r'^```json\s*|\s*```$', '', text.strip())
-    return json.loads(clean_text)
 
 def markdown_to_html(text: str) -> str:
     # Bold **text**
@@ -13,3 +7,47 @@ def markdown_to_html(text: str) -> str:
     # Inline code `text`
     text = re.sub(r'`(.*?)`', r'<code>\1</code>', text)
     return text
+
+def normalize_text(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    text = re.sub(r'[^\w\s]', ' ', text.lower())
+    return re.sub(r'\s+', ' ', text).strip()
+
+# Informal spellings mapped to one form so they share a cache entry
+SLANG_WORDS = {
+    'sy': 'saya', 'aku': 'saya', 'gw': 'saya', 'gue': 'saya', 'gua': 'saya', 'ane': 'saya',
+    'brp': 'berapa', 'brapa': 'berapa', 'brpa': 'berapa',
+    'gk': 'tidak', 'ga': 'tidak', 'gak': 'tidak', 'nggak': 'tidak', 'ngga': 'tidak', 'tdk': 'tidak',
+    'udh': 'sudah', 'udah': 'sudah', 'sdh': 'sudah', 'blm': 'belum', 'blum': 'belum',
+    'yg': 'yang', 'dgn': 'dengan', 'utk': 'untuk', 'dr': 'dari', 'sm': 'sama',
+    'bgt': 'banget', 'aja': 'saja', 'aj': 'saja', 'jg': 'juga', 'lg': 'lagi', 'skrg': 'sekarang',
+    'tlg': 'tolong', 'pls': 'tolong', 'plis': 'tolong',
+    'dompet': 'wallet', 'walet': 'wallet', 'dompetku': 'wallet saya', 'walletku': 'wallet saya',
+    'saldoku': 'saldo saya', 'ceck': 'cek', 'check': 'cek', 'cekin': 'cek', 'liat': 'lihat',
+    'dong': '', 'donk': '', 'dunk': '', 'deh': '', 'sih': '', 'ya': '', 'yah': '', 'kak': '', 'min': '',
+}
+
+def normalize_message(text: str) -> str:
+    """normalize_text() plus SLANG_WORDS, for comparing near-identical phrasings."""
+    words = (SLANG_WORDS.get(word, word) for word in normalize_text(text).split())
+    return ' '.join(word for word in words if word)
+
+NOMINAL_UNITS = {'rb': 1_000, 'ribu': 1_000, 'k': 1_000, 'jt': 1_000_000, 'juta': 1_000_000}
+NOMINAL = re.compile(r'(\d+(?:[.,]\d+)*)\s*(rb|ribu|k|jt|juta)?\b', re.IGNORECASE)
+
+def parse_nominal(text: str):
+    """First amount in `text` as a number: '15000', '15.000', '15rb', '1,5jt'. None if there is none."""
+    match = NOMINAL.search(text)
+    if not match:
+        return None
+
+    number, unit = match.group(1), (match.group(2) or '').lower()
+    if unit:
+        # 1,5jt / 1.5jt: the separator is a decimal point
+        value = float(number.replace(',', '.')) if number.count('.') + number.count(',') == 1 else \
+            float(re.sub(r'[.,]', '', number))
+        value *= NOMINAL_UNITS[unit]
+    else:
+        # 15.000 / 15,000: the separator groups thousands
+        value = float(re.sub(r'[.,]', '', number))
+    return int(value) if value.is_integer() else value
@@ -1,6 +1,9 @@
 
 import os
+import asyncio
 import logging
+from datetime import time
+from zoneinfo import ZoneInfo
 from telegram.ext import (
     ApplicationBuilder, 
     filters,
@@ -15,8 +18,23 @@ from bot.handlers.cashflow import CashflowHandler
 from bot.services.llm_model import LLMModel
 from bot.services.cache import CacheMessage
 from bot.services.image import ImageManager
+from bot.services.intent_classifier import IntentClassifier
+from bot.services.profile_cache import ProfileCache
+from bot.services.chart import ChartService
+from bot.services.report import ReportEngine
+from bot.services.report_cache import ReportCache
+from bot.services.digest import DigestService
+from bot.services.token_budget import TokenBudget
+from bot.services.llm_router import publish_metrics
 from bot.config import setup_logging
-from bot.constants import BOT_TELEGRAM_API
+from bot.constants import (
+    BOT_TELEGRAM_API,
+    BOT_CONCURRENT_UPDATES,
+    DIGEST_TIME,
+    DIGEST_TIMEZONE,
+    DIGEST_WEEKLY_DAY,
+    LLM_METRICS_INTERVAL,
+)
 
 load_dotenv()
 setup_logging()
@@ -26,17 +44,31 @@ logger = logging.getLogger(__name__)
 class TelegramFinanceBot:
     def __init__(self):
         self.token = BOT_TELEGRAM_API
-        self.app = ApplicationBuilder().token(self.token).build()
+        self.app = (
+            ApplicationBuilder()
+            .token(self.token)
+            .concurrent_updates(BOT_CONCURRENT_UPDATES)
+            .post_init(self._post_init)
+            .post_shutdown(self._post_shutdown)
+            .build()
+        )
 
-        self.llm_model = LLMModel()
         self.cache = CacheMessage()
+        self.llm_model = LLMModel(TokenBudget(self.cache))
         self.image_manager = ImageManager()
+        self.intent_classifier = IntentClassifier()
+        self.profile_cache = ProfileCache(self.cache)
+        self.chart_service = ChartService()
 
-        self.index_handler = IndexHandler()
-        self.base_intent = BaseIntent(self.llm_model, self.cache, self.image_manager)
-        self.cashflow_handler = CashflowHandler(self.llm_model, self.cache)
+        self.index_handler = IndexHandler(profile_cache=self.profile_cache)
+        self.base_intent = BaseIntent(
+            self.llm_model, self.cache, self.image_manager, self.intent_classifier, self.profile_cache,
+            self.chart_service)
+        self.cashflow_handler = CashflowHandler(self.llm_model, self.cache, self.profile_cache)
+        self.digest_service = DigestService(self.chart_service, ReportCache(self.cache), ReportEngine())
 
         self._register_handlers()
+        self._schedule_jobs()
 
     def _register_handlers(self):
         self.app.add_handler(CommandHandler('help', self.index_handler.help))
@@ -45,6 +77,34 @@ class TelegramFinanceBot:
         self.app.add_handler(MessageHandler(filters.PHOTO, self.base_intent.handle_photo))
         self.app.add_handler(CallbackQueryHandler(self.cashflow_handler.handle_confirmation_callback))
 
+    def _schedule_jobs(self):
+        run_at = time.fromisoformat(DIGEST_TIME).replace(tzinfo=ZoneInfo(DIGEST_TIMEZONE))
+        daily_days = tuple(day for day in range(7) if day != DIGEST_WEEKLY_DAY)
+
+        self.app.job_queue.run_daily(self.digest_service.daily, run_at, days=daily_days, name='digest_daily')
+        self.app.job_queue.run_daily(
+            self.digest_service.weekly, run_at, days=(DIGEST_WEEKLY_DAY,), name='digest_weekly')
+
+        self.app.job_queue.run_repeating(self._publish_llm_metrics, LLM_METRICS_INTERVAL, name='llm_metrics')
+
+    async def _publish_llm_metrics(self, context):
+        await publish_metrics(self.llm_model.tier_metrics, self.cache.redis_client, {
+            'intent': self.llm_model.intent_metrics(),
+            'response_cache': self.base_intent.response_cache.stats(),
+        })
+
+    async def _post_init(self, app):
+        # Open the kaleido browsers before the first report asks for a chart
+        try:
+            await asyncio.to_thread(self.chart_service.start)
+        except Exception as error:
+            logger.warning(f'Chart pool not started, retry on first chart: {error}')
+            self.chart_service.close()
+
+    async def _post_shutdown(self, app):
+        self.chart_service.close()
+        await self.llm_model.prompt_cache.close()
+
     def run(self):
         logger.info('Bot is starting...')
         self.app.run_polling()
@@ -1,3 +1,4 @@
 from bot.models.user_model import User
 from bot.models.wallet_model import Wallet
-from bot.models.cashflow_model import Cashflow
\ No newline at end of file
+from bot.models.cashflow_model import Cashflow
+from bot.models.cashflow_rollup_model import CashflowDailyRollup
\ No newline at end of file
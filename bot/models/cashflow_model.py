@@ -1,5 +1,5 @@
 from sqlalchemy import (
-    Column, Integer, String, Text, ForeignKey, DateTime, Numeric, Enum, Boolean
+    Column, Integer, String, Text, ForeignKey, DateTime, Numeric, Enum, Boolean, Index
 )
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -13,9 +13,13 @@ class FlowType(enum.Enum):
 
 class Cashflow(Base):
     __tablename__ = 'cashflow'
+    __table_args__ = (
+        Index('idx_user_active_date', 'userId', 'isActive', 'transactionDate'),
+        Index('idx_user_wallet_date', 'userId', 'walletId', 'transactionDate'),
+    )
     
     id = Column(String(24), primary_key=True)
-    userId = Column(String(24), ForeignKey('users.id'), nullable=False, index=True)
+    userId = Column(String(24), ForeignKey('users.id'), nullable=False)
     walletId = Column(String(24), ForeignKey('wallets.id'), nullable=False, index=True)
     transactionDate = Column(DateTime, nullable=False)
     activityName = Column(String(255), nullable=False)
@@ -30,5 +34,5 @@ class Cashflow(Base):
     createdAt = Column(DateTime, default=datetime.utcnow)
     updatedAt = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-    user = relationship('User', back_populates='cashflows', lazy='selectin')
-    wallet = relationship('Wallet', back_populates='cashflows', lazy='selectin')
+    user = relationship('User', back_populates='cashflows', lazy='raise_on_sql')
+    wallet = relationship('Wallet', back_populates='cashflows', lazy='raise_on_sql')
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, Date, Numeric, Enum
+from bot.services.database import Base
+from bot.models.cashflow_model import FlowType
+
+class CashflowDailyRollup(Base):
+    """Per user, wallet, day and flowType totals of active cashflow rows.
+
+    Maintained in the same transaction as every cashflow insert, see
+    bot.services.rollup for the upsert, rebuild and consistency check.
+    """
+    __tablename__ = 'cashflow_daily_rollup'
+
+    userId = Column(String(24), primary_key=True)
+    walletId = Column(String(24), primary_key=True)
+    day = Column(Date, primary_key=True)
+    flowType = Column(Enum(FlowType), primary_key=True)
+    total = Column(Numeric(17, 2), nullable=False, default=0.00)
+    count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,33 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy.orm import load_only, selectinload
+from bot.models.user_model import User
+from bot.models.wallet_model import Wallet
+from bot.models.cashflow_model import Cashflow
+
+# Relationships are lazy='raise' / 'raise_on_sql', so every query has to say
+# what it needs. Use these options instead of ad-hoc selectinload chains.
+
+
+def user_routing_options():
+    """Lean identity load used on every message: user columns plus active wallets."""
+    return (
+        load_only(User.id, User.name, User.username, User.telegramId, User.isActive),
+        selectinload(User.wallets.and_(Wallet.isActive == True)).load_only(
+            Wallet.id, Wallet.name, Wallet.balance, Wallet.isActive
+        ),
+    )
+
+
+def user_history_options(start: Optional[datetime] = None, end: Optional[datetime] = None):
+    """Opt-in eager load of active cashflows (optionally bounded by date) for reports."""
+    criteria = [Cashflow.isActive == True]
+    if start:
+        criteria.append(Cashflow.transactionDate >= start)
+    if end:
+        criteria.append(Cashflow.transactionDate < end)
+
+    return (
+        *user_routing_options(),
+        selectinload(User.cashflows.and_(*criteria)),
+    )
@@ -18,5 +18,5 @@ class User(Base):
     createdAt = Column(DateTime, default=datetime.utcnow)
     lastLogin = Column(DateTime, nullable=True)
 
-    wallets = relationship('Wallet', back_populates='user', lazy='selectin')
-    cashflows = relationship('Cashflow', back_populates='user', lazy='selectin')
+    wallets = relationship('Wallet', back_populates='user', lazy='raise')
+    cashflows = relationship('Cashflow', back_populates='user', lazy='raise')
@@ -15,5 +15,5 @@ class Wallet(Base):
     createdAt = Column(DateTime, default=datetime.utcnow)
     updatedAt = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-    user = relationship('User', back_populates='wallets', lazy='selectin')
-    cashflows = relationship('Cashflow', back_populates='wallet', lazy='selectin')
+    user = relationship('User', back_populates='wallets', lazy='raise_on_sql')
+    cashflows = relationship('Cashflow', back_populates='wallet', lazy='raise')
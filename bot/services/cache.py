@@ -1,186 +1,219 @@
-import redis
-import json
+import redis.asyncio as redis
 import time
+import functools
+from typing import Optional
 from bot.constants import (
-    REDIS_HOST, 
-    REDIS_PORT, 
-    REDIS_PASSWORD, 
-    REDIS_TIME, 
+    REDIS_HOST,
+    REDIS_PORT,
+    REDIS_PASSWORD,
     REDIS_DATABASE,
+    REDIS_MAX_CONNECTIONS,
+    REDIS_SLOW_OPERATION_MS,
     REDIS_STATE_EXPIRED_TIME,
-    REDIS_CONTEXT_EXPIRED_TIME,
-    REDIS_SESSION_EXPIRED_TIME,
+    PROFILE_CACHE_REDIS_TTL,
 )
-from datetime import datetime
+from bot.services.serializer import get_serializer
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Bump when the shape of the conversation record changes; records written
+# with another version are dropped on read instead of being misinterpreted.
+STATE_SCHEMA_VERSION = 1
+
+# Keys used before the single conversation record, still cleared so that
+# data from older deployments does not linger until its TTL.
+LEGACY_STATE_KEYS = ['context', 'session', 'state', 'last_activity', 'message_count']
+
+# Replace the whole record, keeping `rev` monotonic across replacements.
+# KEYS[1] = record, ARGV = schema, ttl, field1, value1, ...
+SAVE_STATE_SCRIPT = """
+local rev = tonumber(redis.call('HGET', KEYS[1], 'rev') or '0') + 1
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], 'schema', ARGV[1], 'rev', rev, unpack(ARGV, 3))
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return rev
+"""
+
+# Partial update with optional compare-and-set on `rev`.
+# KEYS[1] = record, ARGV = expected rev ('' to skip), ttl, field1, value1, ...
+# Returns the new rev, -1 when the record is gone, 0 on rev mismatch.
+UPDATE_STATE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return -1 end
+if ARGV[1] ~= '' and redis.call('HGET', KEYS[1], 'rev') ~= ARGV[1] then return 0 end
+redis.call('HSET', KEYS[1], unpack(ARGV, 3))
+local rev = redis.call('HINCRBY', KEYS[1], 'rev', 1)
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return rev
+"""
+
+# One pool for the whole process, every CacheMessage shares its connections.
+connection_pool = redis.ConnectionPool(
+    host=REDIS_HOST,
+    port=REDIS_PORT,
+    password=REDIS_PASSWORD,
+    db=REDIS_DATABASE,
+    max_connections=REDIS_MAX_CONNECTIONS
+)
+
+
+def instrumented(func):
+    """Record latency of a cache operation under the method name."""
+    @functools.wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await func(self, *args, **kwargs)
+        finally:
+            self._record_latency(func.__name__, time.perf_counter() - started)
+    return wrapper
+
+
+
+def data_version_seed() -> int:
+    """Starting value for a missing user:dataver. Milliseconds since epoch, so
+    after eviction or a Redis restart the counter starts above any version
+    handed out before and an old ETag or report digest cannot match again."""
+    return int(time.time() * 1000)
+
 class CacheMessage:
-    def __init__(self):
-        self.redis_client = redis.Redis(
-            host=REDIS_HOST, 
-            port=REDIS_PORT, 
-            password=REDIS_PASSWORD,
-            db=REDIS_DATABASE,
-            decode_responses=True
+    def __init__(self, serializer=None):
+        self.redis_client = redis.Redis(connection_pool=connection_pool)
+        self.serializer = serializer or get_serializer()
+        self.latency = {}
+        self._save_state_script = self.redis_client.register_script(SAVE_STATE_SCRIPT)
+        self._update_state_script = self.redis_client.register_script(UPDATE_STATE_SCRIPT)
+
+    def _record_latency(self, operation, elapsed):
+        count, total, worst = self.latency.get(operation, (0, 0.0, 0.0))
+        self.latency[operation] = (count + 1, total + elapsed, max(worst, elapsed))
+
+        elapsed_ms = elapsed * 1000
+        if elapsed_ms > REDIS_SLOW_OPERATION_MS:
+            logger.warning(f'Slow redis {operation}: {elapsed_ms:.1f}ms')
+        else:
+            logger.debug(f'redis {operation}: {elapsed_ms:.2f}ms')
+
+    def latency_stats(self):
+        """Per operation: count, average ms, max ms."""
+        return {
+            operation: {
+                'count': count,
+                'avg_ms': round(total / count * 1000, 3),
+                'max_ms': round(worst * 1000, 3)
+            }
+            for operation, (count, total, worst) in self.latency.items()
+        }
+
+    @staticmethod
+    def _state_key(user_id):
+        return f'user:conversation:{user_id}'
+
+    def _encode_fields(self, fields: dict) -> list:
+        args = []
+        for name, value in fields.items():
+            if name == 'rev':
+                continue
+            args.extend([name, self.serializer.dumps(value)])
+        return args
+
+    @instrumented
+    async def get_state(self, user_id) -> Optional[dict]:
+        """Ambil state conversation.
+
+        The returned dict carries the record revision under `rev`; pass it to
+        update_state() as expected_rev to detect concurrent writers.
+        """
+        record = await self.redis_client.hgetall(self._state_key(user_id))
+        if not record:
+            return None
+
+        if record.pop(b'schema', None) != str(STATE_SCHEMA_VERSION).encode():
+            await self.redis_client.unlink(self._state_key(user_id))
+            return None
+
+        rev = int(record.pop(b'rev', 0))
+        state = {name.decode(): self.serializer.loads(value) for name, value in record.items()}
+        state['rev'] = rev
+        return state
+
+    @instrumented
+    async def save_state(self, user_id, state: dict) -> int:
+        """Replace the conversation state, returns the new revision."""
+        return await self._save_state_script(
+            keys=[self._state_key(user_id)],
+            args=[STATE_SCHEMA_VERSION, REDIS_STATE_EXPIRED_TIME*60, *self._encode_fields(state)]
         )
 
-    def save_session(self, user_id, session_data):
-        key = f"user:session:{user_id}"
-        self.redis_client.setex(
-            key, 
-            REDIS_SESSION_EXPIRED_TIME*60,  # *60s
-            json.dumps(session_data)
+    @instrumented
+    async def update_state(self, user_id, fields: dict, expected_rev: Optional[int] = None) -> Optional[int]:
+        """Update some fields of the state in place.
+
+        Returns the new revision, or None when the state expired or, with
+        expected_rev, when another update got there first.
+        """
+        if not fields:
+            return expected_rev
+
+        rev = await self._update_state_script(
+            keys=[self._state_key(user_id)],
+            args=[
+                '' if expected_rev is None else expected_rev,
+                REDIS_STATE_EXPIRED_TIME*60,
+                *self._encode_fields(fields)
+            ]
         )
+        return rev if rev > 0 else None
 
-    def get_session(self, user_id):
-        key = f"user:session:{user_id}"
-        session_data = self.redis_client.get(key)
-        
-        if session_data:
-            return json.loads(session_data)
-        return None
+    @instrumented
+    async def clear_state(self, user_id):
+        await self.redis_client.unlink(self._state_key(user_id))
 
-    def save_context(self, user_id, context):
-        key = f"user:context:{user_id}"
-        self.redis_client.setex(
-            key, 
-            REDIS_CONTEXT_EXPIRED_TIME*60,  # *60s
-            json.dumps(context)
+    @instrumented
+    async def save_profile(self, telegram_id, profile):
+        await self.redis_client.set(
+            f'user:profile:{telegram_id}',
+            self.serializer.dumps(profile),
+            ex=PROFILE_CACHE_REDIS_TTL
         )
 
-    def get_context(self, user_id):
-        """Ambil state conversation"""
-        key = f"user:context:{user_id}"
-        state_data = self.redis_client.get(key)
-        
-        if state_data:
-            return json.loads(state_data)
+    @instrumented
+    async def get_profile(self, telegram_id):
+        profile = await self.redis_client.get(f'user:profile:{telegram_id}')
+
+        if profile:
+            return self.serializer.loads(profile)
         return None
-    
-    def clear_context(self, user_id):
-        self.redis_client.delete(f'user:context:{user_id}')
-
-    # def save_message(self, user_id, text, role):
-    #     message_data = {
-    #         'id': int(time.time()),
-    #         'text': text,
-    #         'timestamp': datetime.now().isoformat(),
-    #         'role': role
-    #     }
-
-    #     logger.info(f'Saving {user_id}')
-    #     self.save_context(user_id, message_data)
-        
-    # def save_context(self, user_id, message_data):
-    #     """Simpan konteks percakapan"""
-    #     key = f"user:context:{user_id}"
-        
-    #     # Ambil konteks yang ada
-    #     existing_context = self.get_context(user_id)
-        
-    #     if existing_context:
-    #         existing_context['messages'].append(message_data)
-    #         existing_context['updated_at'] = datetime.now().isoformat()
-    #     else:
-    #         existing_context = {
-    #             'messages': [message_data],
-    #             'topic': 'general',
-    #             'intent': None,
-    #             'entities': {},
-    #             'created_at': datetime.now().isoformat(),
-    #             'updated_at': datetime.now().isoformat()
-    #         }
-        
-    #     # Batasi jumlah pesan (maksimal 20)
-    #     if len(existing_context['messages']) > 20:
-    #         existing_context['messages'] = existing_context['messages'][-20:]
-        
-    #     # Simpan dengan TTL 
-    #     self.redis_client.setex(
-    #         key, 
-    #         REDIS_TIME*60, 
-    #         json.dumps(existing_context)
-    #     )
-        
-    #     # Update last activity
-    #     self.update_last_activity(user_id)
-    
-    # def get_context(self, user_id):
-    #     """Ambil konteks percakapan"""
-    #     key = f"user:context:{user_id}"
-    #     context_data = self.redis_client.get(key)
-        
-    #     if context_data:
-    #         return json.loads(context_data)
-    #     return None
-    
-    # def save_session(self, user_id, session_data):
-    #     """Simpan session user"""
-    #     key = f"user:session:{user_id}"
-    #     self.redis_client.setex(
-    #         key, 
-    #         REDIS_SESSION_EXPIRED_TIME*60,  # *60s
-    #         json.dumps(session_data)
-    #     )
-    
-    # def get_session(self, user_id):
-    #     """Ambil session user"""
-    #     key = f"user:session:{user_id}"
-    #     session_data = self.redis_client.get(key)
-        
-    #     if session_data:
-    #         return json.loads(session_data)
-    #     return None
-
-    # def save_state(self, user_id, state_data):
-    #     """Simpan state conversation"""
-    #     key = f"user:state:{user_id}"
-    #     self.redis_client.setex(
-    #         key, 
-    #         REDIS_STATE_EXPIRED_TIME*60,  # *60s
-    #         json.dumps(state_data)
-    #     )
-
-    # def get_state(self, user_id):
-    #     """Ambil state conversation"""
-    #     key = f"user:state:{user_id}"
-    #     state_data = self.redis_client.get(key)
-        
-    #     if state_data:
-    #         return json.loads(state_data)
-    #     return None
-    
-    # def update_last_activity(self, user_id):
-    #     """Update timestamp aktivitas terakhir"""
-    #     key = f"user:last_activity:{user_id}"
-    #     self.redis_client.setex(
-    #         key, 
-    #         REDIS_CONTEXT_EXPIRED_TIME*60, # *60s
-    #         str(int(time.time()))
-    #     )
-    
-    # def is_context_expired(self, user_id):
-    #     """Cek apakah konteks sudah expired"""
-    #     key = f"user:context:{user_id}"
-    #     return not self.redis_client.exists(key)
-    
-    def clear_user_data(self, user_id):
+
+    @instrumented
+    async def clear_profile(self, telegram_id):
+        await self.redis_client.unlink(f'user:profile:{telegram_id}')
+
+    @instrumented
+    async def bump_data_version(self, user_id) -> int:
+        """Call after any cashflow or wallet write of this (database) user.
+
+        user:datamod keeps the time of the bump for HTTP Last-Modified.
+        """
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            pipe.set(f'user:dataver:{user_id}', data_version_seed(), nx=True)
+            pipe.incr(f'user:dataver:{user_id}')
+            pipe.set(f'user:datamod:{user_id}', int(time.time()))
+            _, version, _ = await pipe.execute()
+        return version
+
+    @instrumented
+    async def get_data_version(self, user_id) -> int:
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            pipe.set(f'user:dataver:{user_id}', data_version_seed(), nx=True)
+            pipe.get(f'user:dataver:{user_id}')
+            _, version = await pipe.execute()
+        return int(version)
+
+    @instrumented
+    async def clear_user_data(self, user_id):
         """Hapus semua data user"""
-        keys_to_delete = [
-            f"user:context:{user_id}",
-            f"user:session:{user_id}",
-            f"user:state:{user_id}",
-            f"user:last_activity:{user_id}",
-            f"user:message_count:{user_id}"
-        ]
-        
-        for key in keys_to_delete:
-            self.redis_client.delete(key)
-    
-    # def extend_context_ttl(self, user_id):
-    #     """Perpanjang TTL konteks (jika masih dalam sesi aktif)"""
-    #     key = f"user:context:{user_id}"
-    #     if self.redis_client.exists(key):
-    #         self.redis_client.expire(key, REDIS_CONTEXT_EXPIRED_TIME*60)  # *60s
+        await self.redis_client.unlink(
+            self._state_key(user_id),
+            *[f'user:{name}:{user_id}' for name in LEGACY_STATE_KEYS]
+        )
@@ -0,0 +1,175 @@
+import atexit
+import asyncio
+import logging
+import multiprocessing
+from datetime import timedelta
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import pandas as pd
+from bot.constants import (
+    CHART_WORKERS,
+    CHART_QUEUE_SIZE,
+    CHART_TIMEOUT,
+    CHART_WIDTH,
+    CHART_HEIGHT,
+)
+from bot.services.report_frame import running_balance, top_activities
+from bot.helpers.output_messages import FLOW_LABELS
+
+logger = logging.getLogger(__name__)
+
+CHART_FORMATS = ('pie', 'line')
+
+TOP_ACTIVITIES = 8
+
+
+class ChartError(Exception):
+    """Chart that could not be rendered, message is shown to the user."""
+
+
+# Worker process state: one event loop and one open kaleido (headless
+# Chrome) per process, started once by the pool initializer.
+_worker_loop = None
+_worker_kaleido = None
+
+
+def _start_worker(timeout):
+    global _worker_loop, _worker_kaleido
+    import kaleido
+
+    _worker_loop = asyncio.new_event_loop()
+    _worker_kaleido = kaleido.Kaleido(n=1, timeout=timeout)
+    _worker_loop.run_until_complete(_worker_kaleido.open())
+    atexit.register(_stop_worker)
+
+
+def _stop_worker():
+    if _worker_kaleido is not None:
+        _worker_loop.run_until_complete(_worker_kaleido.close())
+        _worker_loop.close()
+
+
+def _ping():
+    return True
+
+
+def _render(figure: dict, width: int, height: int) -> bytes:
+    return _worker_loop.run_until_complete(
+        _worker_kaleido.calc_fig(figure, opts={'format': 'png', 'width': width, 'height': height})
+    )
+
+
+def pie_figure(values: pd.Series, title: str) -> dict:
+    """Plain plotly dict, cheap to build and to pickle to the worker."""
+    return {
+        'data': [{
+            'type': 'pie',
+            'labels': [str(label) for label in values.index],
+            'values': (values / 100).tolist(),
+            'hole': 0.4,
+        }],
+        'layout': {'title': {'text': title}},
+    }
+
+
+def line_figure(values: pd.Series, title: str) -> dict:
+    return {
+        'data': [{
+            'type': 'scatter',
+            'mode': 'lines+markers',
+            'x': [moment.strftime('%Y-%m-%d') for moment in values.index],
+            'y': (values / 100).tolist(),
+        }],
+        'layout': {'title': {'text': title}, 'yaxis': {'tickformat': ',.0f'}},
+    }
+
+
+def report_figure(kind: str, frame: pd.DataFrame, start, end, flow_type: str = 'expense',
+                  group_by: str = None) -> dict:
+    """Pie of the biggest activities or line of the cumulative net flow."""
+    if frame.empty:
+        raise ChartError('Tidak ada transaksi untuk dibuat grafik.')
+
+    period = f"{start:%d %b %Y} - {end - timedelta(seconds=1):%d %b %Y}"
+    if kind == 'pie':
+        values = top_activities(frame, flow_type, TOP_ACTIVITIES)
+        if values.empty:
+            raise ChartError(f'Tidak ada transaksi {FLOW_LABELS[flow_type].lower()} untuk dibuat grafik.')
+        return pie_figure(values, f'{FLOW_LABELS[flow_type]} terbesar {period}')
+
+    return line_figure(running_balance(frame, group_by or 'day'), f'Arus kas kumulatif {period}')
+
+
+class ChartService:
+    """Renders plotly figures to PNG in a pool of warm kaleido processes.
+
+    At most `queue_size` charts wait or render at once; further requests are
+    refused right away instead of piling up behind a slow browser.
+    """
+
+    def __init__(self, workers: int = CHART_WORKERS, queue_size: int = CHART_QUEUE_SIZE,
+                 timeout: float = CHART_TIMEOUT):
+        self.workers = workers
+        self.timeout = timeout
+        self.executor = None
+        self._slots = asyncio.Semaphore(queue_size)
+        self._starting = asyncio.Lock()
+
+    def start(self):
+        """Spawn the workers and wait until each has its browser open."""
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_start_worker,
+            initargs=(self.timeout,)
+        )
+        for future in [self.executor.submit(_ping) for _ in range(self.workers)]:
+            future.result()
+        logger.info(f'Chart pool ready with {self.workers} worker(s)')
+
+    def close(self):
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    async def render(self, figure: dict, width: int = CHART_WIDTH, height: int = CHART_HEIGHT) -> bytes:
+        if self._slots.locked():
+            raise ChartError('Antrian grafik sedang penuh, coba lagi sebentar.')
+
+        await self._slots.acquire()
+        loop = asyncio.get_running_loop()
+        try:
+            async with self._starting:
+                if not self.executor:
+                    await asyncio.to_thread(self.start)
+            future = self.executor.submit(_render, figure, width, height)
+        except BrokenProcessPool:
+            self._slots.release()
+            logger.error('Chart worker died, restarting pool')
+            self.close()
+            raise ChartError('Grafik gagal dibuat, coba lagi.')
+        except BaseException:
+            self._slots.release()
+            raise
+
+        # The slot is freed when the worker is done, not when the caller stops
+        # waiting, so renders that outlive the timeout still count as busy
+        future.add_done_callback(lambda _: self._release_from_worker(loop))
+        result = asyncio.wrap_future(future)
+        result.add_done_callback(lambda done: done.cancelled() or done.exception())
+        try:
+            return await asyncio.wait_for(asyncio.shield(result), self.timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f'Chart render timed out after {self.timeout}s')
+            raise ChartError('Grafik terlalu lama dibuat, coba lagi nanti.')
+        except BrokenProcessPool:
+            logger.error('Chart worker died, restarting pool')
+            self.close()
+            raise ChartError('Grafik gagal dibuat, coba lagi.')
+
+    def _release_from_worker(self, loop):
+        try:
+            loop.call_soon_threadsafe(self._slots.release)
+        except RuntimeError:
+            # Loop already closed on shutdown, nobody is waiting for the slot
+            pass
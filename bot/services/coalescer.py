@@ -0,0 +1,75 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Tuple
+from bot.helpers.text_util import normalize_message
+from bot.constants import LLM_DEBOUNCE_SECONDS, LLM_DEBOUNCE_MAX_FRAGMENTS
+
+logger = logging.getLogger(__name__)
+
+
+class MessageCoalescer:
+    """Fewer LLM calls for bursts of text from one user.
+
+    debounce() holds each message for a short window; fragments a user sends
+    within it are merged into one text handled by the last update only.
+    single_flight() lets concurrent calls with the same key share one task,
+    so a double-sent message that is already being answered costs nothing.
+    """
+
+    def __init__(self, window: float = LLM_DEBOUNCE_SECONDS, max_fragments: int = LLM_DEBOUNCE_MAX_FRAGMENTS):
+        self.window = window
+        self.max_fragments = max_fragments
+        self._buffers = {}
+        self._inflight = {}
+        self.merged = 0
+        self.coalesced = 0
+
+    async def debounce(self, user_id, message: str) -> Optional[str]:
+        """Merged text when this is the user's last fragment in the window,
+        None when a later fragment took it over."""
+        if self.window <= 0:
+            return message
+
+        buffer = self._buffers.get(user_id)
+        if buffer is None:
+            buffer = self._buffers[user_id] = {'parts': [], 'arrivals': 0}
+        parts = buffer['parts']
+        # A double-sent fragment is kept once
+        if not parts or normalize_message(parts[-1]) != normalize_message(message):
+            parts.append(message)
+        buffer['arrivals'] += 1
+        arrival = buffer['arrivals']
+
+        if len(parts) < self.max_fragments:
+            await asyncio.sleep(self.window)
+            if self._buffers.get(user_id) is not buffer or buffer['arrivals'] != arrival:
+                return None
+
+        del self._buffers[user_id]
+        if len(parts) > 1:
+            self.merged += len(parts) - 1
+            logger.debug(f'Merged {len(parts)} fragments | {user_id}')
+        return '\n'.join(parts)
+
+    async def single_flight(self, key: Hashable, factory: Callable[[], Awaitable]) -> Tuple[object, bool]:
+        """(result, first) where `first` is False for calls that joined a
+        task already running for `key`. Errors reach every caller."""
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            logger.debug(f'Joined in-flight request | {key}')
+            return await asyncio.shield(task), False
+
+        task = asyncio.ensure_future(factory())
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shielded so a cancelled first caller does not cancel the others
+        return await asyncio.shield(task), True
+
+    def stats(self) -> Dict:
+        return {
+            'merged': self.merged,
+            'coalesced': self.coalesced,
+            'inflight': len(self._inflight),
+            'buffered': len(self._buffers),
+        }
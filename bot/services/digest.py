@@ -0,0 +1,248 @@
+import time
+import asyncio
+import logging
+from decimal import Decimal
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+import pandas as pd
+from sqlalchemy import select
+from telegram.error import Forbidden, RetryAfter, TelegramError
+from telegram.ext import ContextTypes
+from bot.services.database import AsyncSessionLocal
+from bot.services.chart import ChartService, ChartError, line_figure
+from bot.services.report import ReportEngine, FLOW_TYPES
+from bot.services.report_cache import ReportCache
+from bot.models.user_model import User
+from bot.models.wallet_model import Wallet
+from bot.models.cashflow_rollup_model import CashflowDailyRollup
+from bot.helpers.output_messages import render_report
+from bot.constants import (
+    DIGEST_BATCH_SIZE,
+    DIGEST_SEND_RATE,
+    DIGEST_RENDER_CONCURRENCY,
+    DIGEST_CHARTS,
+    DIGEST_TIMEZONE,
+)
+
+logger = logging.getLogger(__name__)
+
+PERIOD_DAYS = {'daily': 1, 'weekly': 7}
+
+
+class RateLimiter:
+    """Spaces awaited calls to at most `rate` per second."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class DigestService:
+    """Daily/weekly report for every active user, run from the JobQueue.
+
+    Users are read in id order batches; each batch costs two queries (active
+    wallets and rollup rows) no matter how many users it holds. The rendered
+    text and chart also go into the report cache under the same key an
+    on-demand request for that range would use.
+    """
+
+    def __init__(self, chart_service: ChartService, report_cache: ReportCache, report_engine: ReportEngine):
+        self.chart_service = chart_service
+        self.report_cache = report_cache
+        self.report_engine = report_engine
+        self.limiter = RateLimiter(DIGEST_SEND_RATE)
+        self.last_run = None
+
+    async def daily(self, context: ContextTypes.DEFAULT_TYPE):
+        await self.run(context.bot, 'daily')
+
+    async def weekly(self, context: ContextTypes.DEFAULT_TYPE):
+        await self.run(context.bot, 'weekly')
+
+    async def run(self, bot, period: str, today: date = None):
+        # The job fires at DIGEST_TIME in DIGEST_TIMEZONE, not the server's zone
+        today = today or datetime.now(ZoneInfo(DIGEST_TIMEZONE)).date()
+        end = datetime.combine(today, datetime.min.time())
+        start = end - timedelta(days=PERIOD_DAYS[period])
+
+        started = time.monotonic()
+        users = sent = 0
+        async for batch in self._user_batches():
+            digests = await self._batch_digests(batch, start, end)
+            render_slots = asyncio.Semaphore(DIGEST_RENDER_CONCURRENCY)
+            results = await asyncio.gather(*(
+                self._deliver(bot, digest, start, end, render_slots) for digest in digests
+            ))
+            users += len(batch)
+            sent += sum(results)
+
+        elapsed = time.monotonic() - started
+        self.last_run = {
+            'period': period,
+            'start': start,
+            'users': users,
+            'sent': sent,
+            'seconds': round(elapsed, 1),
+            'users_per_minute': round(users / elapsed * 60) if elapsed else users,
+        }
+        logger.info(f'Digest {period} {start:%Y-%m-%d}: {self.last_run}')
+
+    @staticmethod
+    async def _user_batches():
+        last_id = ''
+        while True:
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(
+                    select(User.id, User.telegramId)
+                    .where(User.isActive == True, User.id > last_id)
+                    .order_by(User.id)
+                    .limit(DIGEST_BATCH_SIZE)
+                )
+                rows = result.all()
+
+            if not rows:
+                return
+            yield {row.id: row.telegramId for row in rows}
+            last_id = rows[-1].id
+
+    @staticmethod
+    async def _batch_digests(batch: dict, start: datetime, end: datetime) -> list:
+        async with AsyncSessionLocal() as session:
+            wallet_rows = (await session.execute(
+                select(Wallet.userId, Wallet.id, Wallet.name)
+                .where(Wallet.userId.in_(list(batch)), Wallet.isActive == True)
+            )).all()
+            rollup_rows = (await session.execute(
+                select(
+                    CashflowDailyRollup.userId,
+                    CashflowDailyRollup.walletId,
+                    CashflowDailyRollup.day,
+                    CashflowDailyRollup.flowType,
+                    CashflowDailyRollup.total,
+                    CashflowDailyRollup.count,
+                )
+                .where(
+                    CashflowDailyRollup.userId.in_(list(batch)),
+                    CashflowDailyRollup.day >= start.date(),
+                    CashflowDailyRollup.day < end.date(),
+                    CashflowDailyRollup.count > 0,
+                )
+            )).all()
+
+        wallets = defaultdict(dict)
+        for row in wallet_rows:
+            wallets[row.userId][row.id] = row.name
+
+        groups = defaultdict(lambda: defaultdict(lambda: [Decimal('0.00'), 0]))
+        net = defaultdict(lambda: defaultdict(Decimal))
+        for row in rollup_rows:
+            if row.walletId not in wallets[row.userId]:
+                continue
+            flow_type = row.flowType.value
+            group = groups[row.userId][(row.walletId, flow_type)]
+            group[0] += row.total
+            group[1] += row.count
+            if flow_type != 'transfer':
+                net[row.userId][row.day] += row.total if flow_type == 'income' else -row.total
+
+        digests = []
+        for user_id, user_groups in groups.items():
+            names = wallets[user_id]
+            digests.append({
+                'telegramId': batch[user_id],
+                'user': {
+                    'id': user_id,
+                    'wallets': [{'id': wallet_id, 'name': name} for wallet_id, name in names.items()],
+                },
+                # Same shape ReportEngine.summarize() returns without groupBy
+                'report': {
+                    'start': start,
+                    'end': end,
+                    'groupBy': None,
+                    'rows': [
+                        {
+                            'period': None,
+                            'walletId': wallet_id,
+                            'wallet': names[wallet_id],
+                            'flowType': flow_type,
+                            'total': total,
+                            'count': count,
+                        }
+                        for (wallet_id, flow_type), (total, count) in sorted(
+                            user_groups.items(), key=lambda item: (item[0][0], FLOW_TYPES.index(item[0][1]))
+                        )
+                    ]
+                },
+                'net': net[user_id],
+            })
+        return digests
+
+    async def _deliver(self, bot, digest: dict, start: datetime, end: datetime, render_slots) -> bool:
+        # One user's failure must not abort the gather for the whole batch
+        try:
+            return await self._deliver_digest(bot, digest, start, end, render_slots)
+        except Exception:
+            logger.exception(f'Digest failed for {digest["user"]["id"]}')
+            return False
+
+    async def _deliver_digest(self, bot, digest: dict, start: datetime, end: datetime, render_slots) -> bool:
+        # An on-demand request for this range ends at the last day 00:00
+        content = {'dateRange': {
+            'start': f'{start:%Y-%m-%d %H:%M:%S}',
+            'end': f'{end - timedelta(days=1):%Y-%m-%d %H:%M:%S}',
+        }}
+        user = digest['user']
+        cache_digest = await self.report_cache.digest(user['id'], self.report_engine.report_spec(user, content))
+
+        text = render_report(digest['report'])
+        await self.report_cache.put(cache_digest, 'text', text.encode())
+
+        png = None
+        if DIGEST_CHARTS:
+            days = pd.date_range(start, end - timedelta(days=1), freq='D')
+            cents = pd.Series(
+                {pd.Timestamp(day): int(amount * 100) for day, amount in digest['net'].items()}, dtype='int64'
+            )
+            figure = line_figure(
+                cents.reindex(days, fill_value=0).cumsum(),
+                f"Arus kas kumulatif {start:%d %b} - {end - timedelta(days=1):%d %b %Y}"
+            )
+            async with render_slots:
+                try:
+                    png = await self.chart_service.render(figure)
+                    await self.report_cache.put(cache_digest, 'png:line', png)
+                except ChartError as error:
+                    logger.info(f'Digest chart skipped for {user["id"]}: {error}')
+                except Exception as error:
+                    # Still send the text digest without the chart
+                    logger.warning(f'Digest chart failed for {user["id"]}: {error}')
+
+        try:
+            await self._send(bot.send_message, chat_id=digest['telegramId'], text=text, parse_mode='Markdown')
+            if png:
+                message = await self._send(bot.send_photo, chat_id=digest['telegramId'], photo=png)
+                await self.report_cache.put(cache_digest, 'file:line', message.photo[-1].file_id.encode())
+            return True
+        except Forbidden:
+            logger.debug(f'Digest not delivered, bot blocked by {digest["telegramId"]}')
+        except TelegramError as error:
+            logger.warning(f'Digest not delivered to {digest["telegramId"]}: {error}')
+        return False
+
+    async def _send(self, method, **kwargs):
+        await self.limiter.wait()
+        try:
+            return await method(**kwargs)
+        except RetryAfter as error:
+            await asyncio.sleep(error.retry_after)
+            return await method(**kwargs)
@@ -0,0 +1,139 @@
+import os
+import re
+import glob
+import runpy
+import logging
+import tempfile
+import fasttext
+from typing import Optional, Dict, Tuple
+from bot.helpers.text_util import normalize_text
+from bot.constants import (
+    INTENT_DATASET_DIR,
+    INTENT_MODEL_PATH,
+    INTENT_LOCAL_INTENTS,
+    INTENT_LOCAL_THRESHOLD,
+    INTENT_TRAIN_THREADS
+)
+
+logger = logging.getLogger(__name__)
+
+LABEL_PREFIX = '__label__'
+
+
+class IntentClassifier:
+    """Local fastText classifier that answers cheap intents without Gemini.
+
+    Only intents listed in INTENT_LOCAL_INTENTS are ever answered locally, and
+    only when the prediction is confident and the message carries no numbers
+    (nominal, quantity, date) that the LLM would have to extract.
+    """
+
+    def __init__(self, model_path: str = INTENT_MODEL_PATH):
+        self.model = None
+
+        if not os.path.exists(model_path):
+            logger.warning(f'Intent model {model_path} not found, local classification disabled')
+            return
+
+        self.model = fasttext.load_model(model_path)
+        logger.info(f'Intent model loaded from {model_path}')
+
+    def predict(self, message: str) -> Optional[Tuple[str, float]]:
+        if not self.model:
+            return None
+
+        text = normalize_text(message)
+        if not text:
+            return None
+
+        try:
+            labels, probs = self.model.predict(text, k=1)
+        except (ValueError, RuntimeError) as error:
+            # e.g. fasttext 0.9.3 under NumPy 2: "Unable to avoid copy"
+            logger.warning(f'Intent prediction failed, falling through to Gemini: {error}')
+            return None
+        return labels[0][len(LABEL_PREFIX):], float(probs[0])
+
+    def classify(self, message: str) -> Optional[Dict]:
+        """Return an intent response shaped like the LLM one, or None to fall through."""
+        if re.search(r'\d', message):
+            return None
+
+        prediction = self.predict(message)
+        if not prediction:
+            return None
+
+        intent, confidence = prediction
+        if intent not in INTENT_LOCAL_INTENTS or confidence < INTENT_LOCAL_THRESHOLD:
+            return None
+
+        return {
+            'intent': intent,
+            'content': '',
+            'confidence': confidence,
+            'inputToken': 0,
+            'outputToken': 0
+        }
+
+
+def load_dataset(dataset_dir: str = INTENT_DATASET_DIR) -> Dict[str, list]:
+    """Read every datasets/<INTENT>.py file, each defining a `texts` list."""
+    dataset = {}
+    for path in sorted(glob.glob(os.path.join(dataset_dir, '*.py'))):
+        intent = os.path.splitext(os.path.basename(path))[0]
+        dataset[intent] = runpy.run_path(path)['texts']
+    return dataset
+
+
+def train(dataset_dir: str = INTENT_DATASET_DIR, model_path: str = INTENT_MODEL_PATH):
+    dataset = load_dataset(dataset_dir)
+    if len(dataset) < 2:
+        raise ValueError(f'Need at least two intent files in {dataset_dir}')
+
+    samples = {
+        intent: sorted({text for text in map(normalize_text, texts) if text})
+        for intent, texts in dataset.items()
+    }
+    # fastText has no class weights; repeat the smaller intents so the
+    # largest one does not win every ambiguous message.
+    largest = max(len(texts) for texts in samples.values())
+
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False, encoding='utf-8') as tf:
+        train_path = tf.name
+        for intent, texts in samples.items():
+            repeat = max(1, round(largest / len(texts))) if texts else 0
+            for text in texts * repeat:
+                tf.write(f'{LABEL_PREFIX}{intent} {text}\n')
+
+    try:
+        model = fasttext.train_supervised(
+            input=train_path,
+            epoch=50,
+            lr=0.5,
+            wordNgrams=2,
+            minn=2,
+            maxn=5,
+            dim=50,
+            thread=INTENT_TRAIN_THREADS,
+            verbose=0
+        )
+        tested, precision, _ = model.test(train_path)
+    finally:
+        os.remove(train_path)
+
+    os.makedirs(os.path.dirname(model_path) or '.', exist_ok=True)
+    model.save_model(model_path)
+
+    for intent, texts in samples.items():
+        logger.info(f'{intent}: {len(texts)} samples')
+    logger.info(f'Trained on {tested} lines, precision@1 {precision:.3f}, saved to {model_path}')
+
+
+def main():
+    from bot.config import setup_logging
+    setup_logging()
+    train()
+
+
+if __name__ == '__main__':
+    main()
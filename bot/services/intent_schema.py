@@ -0,0 +1,94 @@
+from typing import List, Literal, Optional
+from pydantic import BaseModel, Field
+
+# Gemini fills this envelope through response_schema; each intent has its
+# own field instead of one `content` whose type changes with the intent,
+# which JSON schema for structured output cannot express cleanly.
+
+IntentName = Literal[
+    'CATAT_TRANSAKSI',
+    'TANYA_WALLET',
+    'MINTA_LAPORAN',
+    'TAMBAH_WALLET',
+    'PINDAH_WALLET',
+    'LAINNYA',
+]
+
+FlowTypeName = Literal['income', 'expense', 'transfer']
+
+
+class TransactionItem(BaseModel):
+    date: str = Field(description='YYYY-MM-DD HH:MM:SS')
+    activityName: str
+    quantity: float
+    unit: str = Field(description='porsi, kg, layanan, unit, ...')
+    flowType: FlowTypeName
+    itemType: Literal['product', 'service']
+    price: Optional[float] = Field(description='null jika tidak disebut')
+    wallet: str = Field(description='nama wallet, default cash')
+
+
+class NewWallet(BaseModel):
+    name: str
+    initialBalance: float = Field(description='0 jika tidak disebut')
+
+
+class WalletTransfer(BaseModel):
+    sourceWallet: str
+    targetWallet: str
+    nominal: float
+    fee: float
+
+
+class DateRange(BaseModel):
+    start: str = Field(description='YYYY-MM-DD HH:MM:SS')
+    end: str = Field(description='YYYY-MM-DD HH:MM:SS')
+
+
+class ReportRequest(BaseModel):
+    dateRange: DateRange
+    flowType: List[FlowTypeName] = Field(description='kosong untuk semua')
+    wallet: Optional[str] = Field(description='null untuk semua wallet')
+    groupBy: Optional[Literal['day', 'week', 'month']]
+    outputFormat: List[Literal['table', 'pie', 'line']]
+
+
+class IntentEnvelope(BaseModel):
+    intent: IntentName
+    transactions: Optional[List[TransactionItem]] = Field(None, description='hanya untuk CATAT_TRANSAKSI')
+    wallet: Optional[NewWallet] = Field(None, description='hanya untuk TAMBAH_WALLET')
+    transfer: Optional[WalletTransfer] = Field(None, description='hanya untuk PINDAH_WALLET')
+    report: Optional[ReportRequest] = Field(None, description='hanya untuk MINTA_LAPORAN')
+    answer: Optional[str] = Field(None, description='hanya untuk LAINNYA, jawaban untuk user')
+
+    def to_response(self) -> dict:
+        """The {'intent', 'content'} dict the handlers and state cache use."""
+        content = {
+            'CATAT_TRANSAKSI': self.transactions,
+            'TAMBAH_WALLET': self.wallet,
+            'PINDAH_WALLET': self.transfer,
+            'MINTA_LAPORAN': self.report,
+            'LAINNYA': self.answer,
+        }.get(self.intent)
+
+        if not content:
+            if self.intent not in ('TANYA_WALLET', 'LAINNYA'):
+                raise ValueError(f'{self.intent} without its content')
+            content = ''
+        elif isinstance(content, list):
+            content = [_plain(item.model_dump()) for item in content]
+        elif isinstance(content, BaseModel):
+            content = _plain(content.model_dump())
+
+        return {'intent': self.intent, 'content': content}
+
+
+def _plain(value):
+    """Whole-number floats back to int, as free-form JSON parsing gave them."""
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_plain(item) for item in value]
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
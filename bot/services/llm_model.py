@@ -1,45 +1,198 @@
-import json
-import re
+import time
+import asyncio
 import os
+import logging
 from typing import Optional, List, Dict
 from google import genai
-from google.genai import types
+from google.genai import types, errors
 from bot.helpers.date_util import now_as_string
+from bot.services.prompt_cache import PromptCacheManager
+from bot.services.intent_schema import IntentEnvelope
+from bot.services.token_budget import TokenBudget
+from bot.services.llm_router import TIERS, TierMetrics, choose_tier
 from bot.constants import (
     GEMINI_API_KEY,
     GEMINI_MODEL,
     GEMINI_SYSTEM_INSTRUCTION_BASE,
-    GEMINI_SYSTEM_INSTRUCTION_BASE_PHOTO
+    GEMINI_SYSTEM_INSTRUCTION_BASE_PHOTO,
+    LLM_MAX_CONCURRENCY,
+    LLM_TIMEOUT,
+    LLM_PARSE_RETRIES
 )
 
+logger = logging.getLogger(__name__)
+
+# Structured output: Gemini answers with JSON matching IntentEnvelope
+INTENT_OUTPUT = {
+    'response_mime_type': 'application/json',
+    'response_schema': IntentEnvelope,
+}
+
 
 class LLMModel:
-    def __init__(self):
+    def __init__(self, token_budget: Optional[TokenBudget] = None):
         os.environ['GEMINI_API_KEY'] = GEMINI_API_KEY
         self.client = genai.Client()
+        self.prompt_cache = PromptCacheManager(self.client)
+        self.token_budget = token_budget
+        self.tier_metrics = TierMetrics()
+        self._semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+        self.intent_stats = {'responses': 0, 'failures': 0, 'retries': 0}
 
-    def create_base_chat_model(self, history: Optional[List] = None):
-        return self.create_chat_model(GEMINI_SYSTEM_INSTRUCTION_BASE.replace('{d}', now_as_string()), history)
+    async def create_base_chat_model(self, history: Optional[List] = None, model: str = GEMINI_MODEL):
+        # The instruction is static so it can live in a context cache
+        config = await self.prompt_cache.config(
+            f'base:{model}', GEMINI_SYSTEM_INSTRUCTION_BASE, model=model, **INTENT_OUTPUT)
+        return self.client.aio.chats.create(model=model, config=config, history=history)
 
     def create_chat_model(self, instruction: str, history: Optional[List] = None):
-        return self.client.chats.create(
+        return self.client.aio.chats.create(
             model=GEMINI_MODEL,
             config=types.GenerateContentConfig(system_instruction=instruction),
             history=history
         )
 
-    def parse_context_image(self, image_bytes):
-        return self.client.models.generate_content(
-            model=GEMINI_MODEL,
-            contents=[
-            types.Part.from_bytes(
-                data=image_bytes,
-                mime_type='image/jpeg',
-            ),
-            GEMINI_SYSTEM_INSTRUCTION_BASE_PHOTO
-            ]
-        )
+    async def send_base_message(self, message: str, history: Optional[List] = None, model: str = GEMINI_MODEL):
+        # The date is the only per-turn context, sent as its own small part
+        parts = [f'Sekarang: {now_as_string()}', message]
+
+        async def send():
+            chat = await self.create_base_chat_model(history, model)
+            return await self._call(chat.send_message(parts))
+        return await self._with_prompt_cache(f'base:{model}', send)
+
+    async def send_message(self, instruction: str, message: str, history: Optional[List] = None):
+        chat = self.create_chat_model(instruction, history)
+        return await self._call(chat.send_message(message))
+
+    async def parse_context_image(self, image_bytes, model: str = GEMINI_MODEL):
+        async def send():
+            config = await self.prompt_cache.config(
+                f'photo:{model}', GEMINI_SYSTEM_INSTRUCTION_BASE_PHOTO, model=model, **INTENT_OUTPUT)
+            return await self._call(self.client.aio.models.generate_content(
+                model=model,
+                contents=[
+                types.Part.from_bytes(
+                    data=bytes(image_bytes),
+                    mime_type='image/jpeg',
+                )
+                ],
+                config=config
+            ))
+        return await self._with_prompt_cache(f'photo:{model}', send)
+
+    async def classify_message(self, message: str, user_id: str = None) -> Dict:
+        return await self._parse_intent(
+            lambda model: self.send_base_message(message, model=model), choose_tier(message), user_id)
+
+    async def classify_image(self, image_bytes, user_id: str = None) -> Dict:
+        # Receipts always need the main model
+        return await self._parse_intent(
+            lambda model: self.parse_context_image(image_bytes, model=model), 'main', user_id)
+
+    async def _parse_intent(self, request, tier: str, user_id: Optional[str]) -> Dict:
+        """Validated {'intent', 'content', 'inputToken', 'outputToken', 'cachedToken'} from
+        `request(model)`, asking again up to LLM_PARSE_RETRIES times when the
+        answer does not fit IntentEnvelope. Tokens of every attempt count.
+
+        A lite call that errors or gives an invalid answer is repeated on the
+        main model, unless the token budget is over and only lite is allowed.
+        Raises TokenBudgetExceeded past the hard budget.
+        """
+        lite_only = False
+        if self.token_budget and user_id:
+            budget = await self.token_budget.check(user_id)
+            if budget.over:
+                logger.info(f'Over token budget, lite model only | {user_id} | {budget}')
+                tier, lite_only = 'lite', True
+
+        input_token = output_token = cached_token = 0
+        attempt = 0
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    response = await request(TIERS[tier])
+                except errors.APIError as error:
+                    self.tier_metrics.record_error(tier)
+                    if tier == 'main' or lite_only:
+                        raise
+                    logger.warning(f'{TIERS[tier]} failed, falling back to main: {error}')
+                    tier = 'main'
+                    continue
+
+                usage = response.usage_metadata
+                # inputToken stays the full prompt size; the part served from a
+                # context cache (billed at the cached rate) is kept apart
+                call_input = usage.prompt_token_count or 0
+                call_cached = usage.cached_content_token_count or 0
+                call_output = usage.candidates_token_count or 0
+                input_token += call_input
+                cached_token += call_cached
+                output_token += call_output
+                self.tier_metrics.record(tier, time.perf_counter() - started, call_input + call_output, call_cached)
+                self.intent_stats['responses'] += 1
+
+                try:
+                    result = IntentEnvelope.model_validate_json(response.text or '').to_response()
+                    break
+                except ValueError as error:
+                    self.intent_stats['failures'] += 1
+                    logger.warning(f'Invalid intent answer from {tier} (attempt {attempt + 1}) '
+                                   f'| {self.intent_stats} | {error}')
+                    if attempt == LLM_PARSE_RETRIES:
+                        raise
+                    attempt += 1
+                    self.intent_stats['retries'] += 1
+                    if not lite_only:
+                        tier = 'main'
+        finally:
+            if self.token_budget and user_id:
+                await self.token_budget.record(user_id, input_token + output_token)
+
+        result['inputToken'] = input_token
+        result['outputToken'] = output_token
+        result['cachedToken'] = cached_token
+        if cached_token:
+            logger.debug(f'Cached prompt tokens | {cached_token} of {input_token}')
+        return result
+
+    def intent_failure_rate(self) -> float:
+        responses = self.intent_stats['responses']
+        return self.intent_stats['failures'] / responses if responses else 0.0
+
+    def intent_metrics(self) -> Dict:
+        """Structured output counters since start, published with the tier metrics."""
+        return {**self.intent_stats, 'failure_rate': round(self.intent_failure_rate(), 4)}
+
+    async def _with_prompt_cache(self, key: str, send):
+        """Run `send` once more without the context cache when Gemini no
+        longer knows the cache it referenced (deleted or expired early)."""
+        try:
+            return await send()
+        except errors.ClientError as error:
+            cache_rejected = error.code == 404 or 'cache' in str(error).lower()
+            if not (cache_rejected and self.prompt_cache.invalidate(key)):
+                raise
+            logger.warning(f'Context cache {key} rejected, retrying without it: {error}')
+            return await send()
+
+    async def _call(self, coroutine, timeout: float = LLM_TIMEOUT):
+        """Run a Gemini request under the shared concurrency limit and timeout.
+
+        The timeout covers waiting for a free slot as well, so a saturated
+        bot answers with an error instead of queueing forever. On timeout or
+        handler cancellation the underlying request task is cancelled.
+        """
+        async def run():
+            try:
+                async with self._semaphore:
+                    return await coroutine
+            finally:
+                coroutine.close()
 
-    def parse_json_response(self, text: str) -> Dict:
-        clean_text = re.sub(r'^```json\s*|\s*```$', '', text.strip())
-        return json.loads(clean_text)
+        try:
+            return await asyncio.wait_for(run(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f'Gemini request timed out after {timeout}s')
+            raise
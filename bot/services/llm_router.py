@@ -0,0 +1,108 @@
+import re
+import json
+import time
+import logging
+from typing import Dict, Optional
+from collections import defaultdict
+from redis.exceptions import RedisError
+from bot.constants import GEMINI_MODEL, GEMINI_MODEL_LITE, LLM_LITE_MAX_WORDS, LLM_METRICS_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+TIERS = {
+    'lite': GEMINI_MODEL_LITE or GEMINI_MODEL,
+    'main': GEMINI_MODEL,
+}
+
+METRICS_KEY = 'llm:metrics'
+
+# 15000, 15.000, 15rb, 2 porsi ...
+NUMBER = re.compile(r'\d+(?:[.,]\d+)*')
+ITEM_SEPARATORS = re.compile(r'[,;]|\b(dan|lalu|terus|trus|sama|plus|serta|juga)\b')
+
+
+def choose_tier(message: str) -> str:
+    """'main' for text that probably holds several transactions, 'lite'
+    for the rest (wallet questions, single items, small talk)."""
+    if TIERS['lite'] == TIERS['main']:
+        return 'main'
+
+    text = message.lower()
+    numbers = len(NUMBER.findall(text))
+    if '\n' in text or numbers >= 3 or len(text.split()) > LLM_LITE_MAX_WORDS:
+        return 'main'
+    if numbers >= 2 and ITEM_SEPARATORS.search(text):
+        return 'main'
+    return 'lite'
+
+
+class TierMetrics:
+    """Calls, errors, tokens and latency per tier since the last flush()."""
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self.started = time.monotonic()
+        self.calls = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.tokens = defaultdict(int)
+        self.cached_tokens = defaultdict(int)
+        self.cache_hits = defaultdict(int)
+        self.latencies = defaultdict(list)
+
+    def record(self, tier: str, seconds: float, tokens: int, cached_tokens: int = 0):
+        self.calls[tier] += 1
+        self.tokens[tier] += tokens
+        self.cached_tokens[tier] += cached_tokens
+        self.cache_hits[tier] += bool(cached_tokens)
+        self.latencies[tier].append(seconds)
+
+    def record_error(self, tier: str):
+        self.errors[tier] += 1
+
+    def snapshot(self) -> dict:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        snapshot = {}
+        for tier in TIERS:
+            latencies = sorted(self.latencies[tier])
+            snapshot[tier] = {
+                'model': TIERS[tier],
+                'calls': self.calls[tier],
+                'errors': self.errors[tier],
+                'tokens': self.tokens[tier],
+                'cached_tokens': self.cached_tokens[tier],
+                'cache_hit_rate': round(self.cache_hits[tier] / self.calls[tier], 3) if self.calls[tier] else 0.0,
+                'tokens_per_second': round(self.tokens[tier] / elapsed, 2),
+                'avg_ms': round(sum(latencies) / len(latencies) * 1000) if latencies else 0,
+                'p95_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000)
+                if latencies else 0,
+            }
+        return snapshot
+
+    def flush(self) -> dict:
+        snapshot = self.snapshot()
+        self._reset()
+        return snapshot
+
+
+async def publish_metrics(metrics: TierMetrics, redis_client, extra: Optional[Dict[str, dict]] = None):
+    """JobQueue callback body: log the interval and keep it in Redis
+    (llm:metrics, one JSON value per tier) for dashboards. `extra` adds
+    other counters under their own field, e.g. {'intent': {...}}."""
+    snapshot = metrics.flush()
+    for tier, values in snapshot.items():
+        logger.info(f'LLM tier {tier} | {values}')
+    for name, values in (extra or {}).items():
+        logger.info(f'LLM {name} | {values}')
+    snapshot.update(extra or {})
+
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.hset(METRICS_KEY, mapping={
+                tier: json.dumps({**values, 'at': int(time.time())}) for tier, values in snapshot.items()
+            })
+            pipe.expire(METRICS_KEY, LLM_METRICS_INTERVAL * 10)
+            await pipe.execute()
+    except RedisError as error:
+        logger.warning(f'LLM metrics not published: {error}')
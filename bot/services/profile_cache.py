@@ -0,0 +1,96 @@
+import time
+import logging
+from collections import OrderedDict
+from typing import Optional
+from sqlalchemy.future import select
+from bot.services.database import AsyncSessionLocal
+from bot.services.cache import CacheMessage
+from bot.models.user_model import User
+from bot.models.loader_options import user_routing_options
+from bot.constants import (
+    PROFILE_CACHE_SIZE,
+    PROFILE_CACHE_TTL
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ProfileCache:
+    """Read-through cache of the user + active wallets profile, keyed by telegram id.
+
+    Tier 1 is an in-process LRU with a short TTL, tier 2 is Redis through
+    CacheMessage, and MySQL is only hit on a miss in both. Anything that changes
+    a user's wallets or balances must call invalidate() after committing.
+    """
+
+    def __init__(self, cache: CacheMessage, maxsize: int = PROFILE_CACHE_SIZE, ttl: int = PROFILE_CACHE_TTL):
+        self.cache = cache
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._local = OrderedDict()
+
+    async def get(self, telegram_id: int) -> Optional[dict]:
+        profile = self._get_local(telegram_id)
+        if profile:
+            return profile
+
+        profile = await self.cache.get_profile(telegram_id)
+        if profile:
+            self._set_local(telegram_id, profile)
+            return profile
+
+        profile = await self._load(telegram_id)
+        if profile:
+            await self.cache.save_profile(telegram_id, profile)
+            self._set_local(telegram_id, profile)
+        return profile
+
+    async def invalidate(self, telegram_id: int):
+        self._local.pop(telegram_id, None)
+        await self.cache.clear_profile(telegram_id)
+
+    def _get_local(self, telegram_id: int) -> Optional[dict]:
+        entry = self._local.get(telegram_id)
+        if not entry:
+            return None
+
+        expires_at, profile = entry
+        if expires_at < time.monotonic():
+            del self._local[telegram_id]
+            return None
+
+        self._local.move_to_end(telegram_id)
+        return profile
+
+    def _set_local(self, telegram_id: int, profile: dict):
+        self._local[telegram_id] = (time.monotonic() + self.ttl, profile)
+        self._local.move_to_end(telegram_id)
+        while len(self._local) > self.maxsize:
+            self._local.popitem(last=False)
+
+    async def _load(self, telegram_id: int) -> Optional[dict]:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(User)
+                .options(*user_routing_options())
+                .where(User.telegramId == telegram_id)
+            )
+            user = result.scalar_one_or_none()
+
+        if not user:
+            return None
+        return self._format_user_data(user)
+
+    @staticmethod
+    def _format_user_data(user: User) -> dict:
+        return {
+            'id': user.id,
+            'name': user.name,
+            'username': user.username,
+            'telegramId': user.telegramId,
+            'isActive': user.isActive,
+            'wallets': [
+                {'id': wallet.id, 'name': wallet.name, 'balance': float(wallet.balance)}
+                for wallet in user.wallets if wallet.isActive
+            ]
+        }
@@ -0,0 +1,136 @@
+import time
+import asyncio
+import logging
+from typing import Optional
+from collections import defaultdict
+from google import genai
+from google.genai import types, errors
+from bot.constants import (
+    GEMINI_MODEL,
+    GEMINI_CONTEXT_CACHE,
+    GEMINI_CACHE_TTL,
+    GEMINI_CACHE_REFRESH_MARGIN,
+    GEMINI_CACHE_RETRY,
+    GEMINI_CACHE_MIN_TOKENS,
+    LLM_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class PromptCacheManager:
+    """Gemini explicit context caches for the static system instructions.
+
+    Each instruction is uploaded once as cached content and requests only
+    reference it by name, so its tokens are billed at the cached rate. The
+    TTL is extended on use once it gets within the refresh margin of expiry.
+    An instruction below GEMINI_CACHE_MIN_TOKENS is never uploaded (Gemini
+    rejects it); it goes out as a plain system_instruction, as it does when
+    caching is off or creation failed, which is retried after GEMINI_CACHE_RETRY.
+    """
+
+    def __init__(self, client: genai.Client, model: str = GEMINI_MODEL, enabled: bool = GEMINI_CONTEXT_CACHE,
+                 ttl: int = GEMINI_CACHE_TTL, refresh_margin: int = GEMINI_CACHE_REFRESH_MARGIN):
+        self.client = client
+        self.model = model
+        self.enabled = enabled
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self._caches = {}  # key -> (cache name, monotonic expiry)
+        self._retry_at = {}
+        self._too_small = set()
+        self._locks = defaultdict(asyncio.Lock)
+
+    async def config(self, key: str, instruction: str, model: str = None, **kwargs) -> types.GenerateContentConfig:
+        name = await self.get(key, instruction, model)
+        if name:
+            return types.GenerateContentConfig(cached_content=name, **kwargs)
+        return types.GenerateContentConfig(system_instruction=instruction, **kwargs)
+
+    async def get(self, key: str, instruction: str, model: str = None) -> Optional[str]:
+        """Name of a live cache holding `instruction` for `model` (default
+        self.model), or None. Caches belong to one model, use one key per model."""
+        if not self.enabled or key in self._too_small:
+            return None
+
+        name = self._fresh(key)
+        if name or self._retry_at.get(key, 0) > time.monotonic():
+            return name or self._alive(key)
+
+        async with self._locks[key]:
+            name = self._fresh(key)
+            if name:
+                return name
+            try:
+                if self._alive(key):
+                    return await self._extend(key)
+                if not await self._large_enough(key, instruction, model or self.model):
+                    return None
+                return await self._create(key, instruction, model or self.model)
+            except (errors.APIError, asyncio.TimeoutError) as error:
+                logger.warning(f'Context cache {key} unavailable, sending full instruction: {error}')
+                self._caches.pop(key, None)
+                self._retry_at[key] = time.monotonic() + GEMINI_CACHE_RETRY
+                return None
+
+    def invalidate(self, key: str) -> bool:
+        """Forget the cache for `key` and pause creating a new one. Returns
+        whether there was one to forget."""
+        if self._caches.pop(key, None) is None:
+            return False
+        self._retry_at[key] = time.monotonic() + GEMINI_CACHE_RETRY
+        return True
+
+    async def close(self):
+        for key, (name, _) in list(self._caches.items()):
+            try:
+                await self.client.aio.caches.delete(name=name)
+            except errors.APIError as error:
+                logger.debug(f'Context cache {key} not deleted: {error}')
+        self._caches.clear()
+
+    def _fresh(self, key: str) -> Optional[str]:
+        entry = self._caches.get(key)
+        if entry and entry[1] - self.refresh_margin > time.monotonic():
+            return entry[0]
+        return None
+
+    def _alive(self, key: str) -> Optional[str]:
+        entry = self._caches.get(key)
+        # A second of slack so a request never names an expiring cache
+        if entry and entry[1] - 1 > time.monotonic():
+            return entry[0]
+        return None
+
+    async def _large_enough(self, key: str, instruction: str, model: str) -> bool:
+        count = await asyncio.wait_for(
+            self.client.aio.models.count_tokens(model=model, contents=instruction), timeout=LLM_TIMEOUT)
+        if count.total_tokens >= GEMINI_CACHE_MIN_TOKENS:
+            return True
+        logger.info(f'Context cache {key} skipped: {count.total_tokens} tokens, '
+                    f'minimum is {GEMINI_CACHE_MIN_TOKENS}')
+        self._too_small.add(key)
+        return False
+
+    async def _create(self, key: str, instruction: str, model: str) -> str:
+        cache = await asyncio.wait_for(self.client.aio.caches.create(
+            model=model,
+            config=types.CreateCachedContentConfig(
+                display_name=key,
+                system_instruction=instruction,
+                ttl=f'{self.ttl}s',
+            )
+        ), timeout=LLM_TIMEOUT)
+        self._caches[key] = (cache.name, time.monotonic() + self.ttl)
+        logger.info(f'Context cache {key} created: {cache.name}')
+        return cache.name
+
+    async def _extend(self, key: str) -> str:
+        name = self._caches[key][0]
+        await asyncio.wait_for(self.client.aio.caches.update(
+            name=name,
+            config=types.UpdateCachedContentConfig(ttl=f'{self.ttl}s')
+        ), timeout=LLM_TIMEOUT)
+        self._caches[key] = (name, time.monotonic() + self.ttl)
+        logger.debug(f'Context cache {key} extended')
+        return name
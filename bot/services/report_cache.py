@@ -0,0 +1,103 @@
+import json
+import time
+import hashlib
+import logging
+from typing import Optional
+from bot.services.cache import CacheMessage
+from bot.constants import (
+    REPORT_CACHE_TTL,
+    REPORT_CACHE_MAX_BYTES,
+    REPORT_CACHE_MAX_ITEM_BYTES,
+)
+
+logger = logging.getLogger(__name__)
+
+LRU_KEY = 'report:lru'
+SIZES_KEY = 'report:sizes'
+BYTES_KEY = 'report:bytes'
+
+# Store one artifact and evict least recently used ones until the byte
+# budget fits again. Sizes of entries that expired on their own stay counted
+# until they reach the front of the LRU, which only makes eviction earlier.
+# KEYS = entry, lru, sizes, bytes; ARGV = value, ttl ms, now, max bytes
+PUT_SCRIPT = """
+local size = string.len(ARGV[1])
+local old = tonumber(redis.call('HGET', KEYS[3], KEYS[1]) or '0')
+redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+redis.call('HSET', KEYS[3], KEYS[1], size)
+redis.call('ZADD', KEYS[2], ARGV[3], KEYS[1])
+local total = redis.call('INCRBY', KEYS[4], size - old)
+local evicted = 0
+while total > tonumber(ARGV[4]) do
+    local oldest = redis.call('ZPOPMIN', KEYS[2])
+    if #oldest == 0 then break end
+    local victim = oldest[1]
+    total = redis.call('DECRBY', KEYS[4], tonumber(redis.call('HGET', KEYS[3], victim) or '0'))
+    redis.call('HDEL', KEYS[3], victim)
+    redis.call('UNLINK', victim)
+    evicted = evicted + 1
+end
+return evicted
+"""
+
+
+def report_digest(user_id: str, spec: dict, data_version: int) -> str:
+    payload = json.dumps(
+        {'userId': user_id, 'spec': spec, 'version': data_version},
+        sort_keys=True,
+        separators=(',', ':')
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ReportCache:
+    """Rendered report artifacts (table text, chart PNG, Telegram file_id)
+    addressed by report_digest().
+
+    The user's data version is part of the digest, so a cashflow or wallet
+    write makes old entries unreachable instead of having to delete them.
+    """
+
+    def __init__(self, cache: CacheMessage, ttl: int = REPORT_CACHE_TTL,
+                 max_bytes: int = REPORT_CACHE_MAX_BYTES, max_item_bytes: int = REPORT_CACHE_MAX_ITEM_BYTES):
+        self.cache = cache
+        self.redis_client = cache.redis_client
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_item_bytes
+        self.hits = 0
+        self.misses = 0
+        self._put_script = self.redis_client.register_script(PUT_SCRIPT)
+
+    async def digest(self, user_id: str, spec: dict) -> str:
+        return report_digest(user_id, spec, await self.cache.get_data_version(user_id))
+
+    @staticmethod
+    def _key(digest: str, artifact: str) -> str:
+        return f'report:{digest}:{artifact}'
+
+    async def get(self, digest: str, artifact: str) -> Optional[bytes]:
+        key = self._key(digest, artifact)
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            pipe.get(key)
+            pipe.zadd(LRU_KEY, {key: time.time()}, xx=True)
+            value, _ = await pipe.execute()
+
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        logger.debug(f'Report cache {"hit" if value is not None else "miss"} {artifact} | {self.hits}/{self.misses}')
+        return value
+
+    async def put(self, digest: str, artifact: str, value: bytes):
+        if len(value) > self.max_item_bytes:
+            logger.info(f'Report {artifact} too large to cache: {len(value)} bytes')
+            return
+
+        evicted = await self._put_script(
+            keys=[self._key(digest, artifact), LRU_KEY, SIZES_KEY, BYTES_KEY],
+            args=[value, self.ttl * 1000, time.time(), self.max_bytes]
+        )
+        if evicted:
+            logger.info(f'Report cache evicted {evicted} entries')
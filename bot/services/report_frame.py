@@ -0,0 +1,132 @@
+import logging
+from decimal import Decimal
+from typing import Optional
+import numpy as np
+import pandas as pd
+from sqlalchemy import select, cast, func, literal_column, type_coerce, BigInteger, String
+from bot.services.database import AsyncSessionLocal
+from bot.models.cashflow_model import Cashflow
+from bot.helpers.cashflow_filter import CashflowFilter
+
+logger = logging.getLogger(__name__)
+
+# Result row layout of cashflow_columns_query(), parsed by numpy in one pass
+# instead of converting datetime/Decimal objects value by value.
+ROW_DTYPE = np.dtype([
+    ('seconds', np.int64),
+    ('walletId', object),
+    ('activityName', object),
+    ('flowType', object),
+    ('cents', np.int64),
+])
+
+FLOW_CATEGORIES = pd.CategoricalDtype(['income', 'expense', 'transfer'])
+
+# Spacing between period starts, see period_index()
+PERIOD_FREQUENCIES = {
+    'day': 'D',
+    'week': 'W-MON',
+    'month': 'MS',
+}
+
+
+def cashflow_columns_query(cashflow_filter: CashflowFilter):
+    """Only the columns a report needs, as plain integers where possible.
+
+    transactionDate comes back as seconds since 1970-01-01 of the stored
+    (naive) value and total as integer cents, so no timezone or Decimal
+    conversion happens per row.
+    """
+    return (
+        select(
+            func.timestampdiff(literal_column('SECOND'), '1970-01-01', Cashflow.transactionDate),
+            Cashflow.walletId,
+            Cashflow.activityName,
+            type_coerce(Cashflow.flowType, String),
+            cast(Cashflow.total * 100, BigInteger),
+        )
+        .where(*cashflow_filter.criteria(Cashflow))
+        .order_by(Cashflow.transactionDate)
+    )
+
+
+def frame_from_rows(rows) -> pd.DataFrame:
+    """Build a typed frame from cashflow_columns_query() result tuples."""
+    # numpy only takes real tuples for structured rows, not SQLAlchemy Row
+    records = np.array([tuple(row) for row in rows], dtype=ROW_DTYPE)
+
+    return pd.DataFrame({
+        'transactionDate': records['seconds'].astype('datetime64[s]').astype('datetime64[ns]'),
+        'walletId': pd.Categorical(records['walletId']),
+        'activityName': pd.Categorical(records['activityName']),
+        'flowType': pd.Categorical(records['flowType'], dtype=FLOW_CATEGORIES),
+        'cents': records['cents'],
+    })
+
+
+async def fetch_cashflow_frame(cashflow_filter: CashflowFilter) -> pd.DataFrame:
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(cashflow_columns_query(cashflow_filter))
+        rows = result.all()
+
+    logger.debug(f'Fetched {len(rows)} cashflow rows for {cashflow_filter.user_id}')
+    return frame_from_rows(rows)
+
+
+def signed_cents(frame: pd.DataFrame) -> pd.Series:
+    """Income positive, expense negative, transfer zero."""
+    sign = np.select(
+        [frame['flowType'] == 'income', frame['flowType'] == 'expense'],
+        [1, -1],
+        default=0
+    )
+    return frame['cents'] * sign
+
+
+def period_index(frame: pd.DataFrame, group_by: str) -> pd.Series:
+    """Start of the day/week/month of every row, weeks start on Monday like
+    PERIOD_EXPRESSIONS in bot.services.report."""
+    days = frame['transactionDate'].to_numpy().astype('datetime64[D]')
+    if group_by == 'week':
+        # 1970-01-01 was a Thursday
+        days = days - (days.astype(np.int64) + 3) % 7
+    elif group_by == 'month':
+        days = days.astype('datetime64[M]').astype('datetime64[D]')
+    return pd.Series(days.astype('datetime64[ns]'), index=frame.index, name='period')
+
+
+def flow_pivot(frame: pd.DataFrame, group_by: Optional[str] = None) -> pd.DataFrame:
+    """Cents per period (or per wallet without group_by) with one column per flowType."""
+    key = period_index(frame, group_by) if group_by else frame['walletId']
+    return (
+        frame.groupby([key, frame['flowType']], observed=True)['cents']
+        .sum()
+        .unstack('flowType', fill_value=0)
+        .reindex(columns=FLOW_CATEGORIES.categories, fill_value=0)
+    )
+
+
+def running_balance(frame: pd.DataFrame, group_by: str = 'day', opening_cents: int = 0) -> pd.Series:
+    """Balance at the end of each period, empty periods carry the last balance."""
+    net = signed_cents(frame).groupby(period_index(frame, group_by)).sum()
+    if net.empty:
+        return net
+
+    periods = pd.date_range(net.index.min(), net.index.max(), freq=PERIOD_FREQUENCIES[group_by])
+    return net.reindex(periods, fill_value=0).cumsum() + opening_cents
+
+
+def top_activities(frame: pd.DataFrame, flow_type: str = 'expense', limit: int = 5) -> pd.Series:
+    """Largest activities by total cents for one flowType, names compared case-insensitively."""
+    selected = frame[frame['flowType'] == flow_type]
+    activities = selected['activityName'].cat
+
+    # Sum per category code first, then fold names that only differ in case
+    by_code = selected['cents'].groupby(activities.codes.to_numpy()).sum()
+    names = activities.categories.str.strip().str.lower()[by_code.index]
+    return by_code.groupby(names.to_numpy()).sum().nlargest(limit)
+
+
+def to_rupiah(cents) -> Decimal:
+    """Integer cents back to a 2 decimal place Decimal."""
+    return Decimal(int(cents)).scaleb(-2)
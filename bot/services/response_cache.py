@@ -0,0 +1,95 @@
+import re
+import time
+import hashlib
+import logging
+from typing import Optional, Dict
+from redis.exceptions import RedisError
+from bot.services.cache import CacheMessage
+from bot.helpers.text_util import normalize_message
+from bot.services.llm_router import TIERS
+from bot.constants import (
+    GEMINI_SYSTEM_INSTRUCTION_BASE,
+    LLM_RESPONSE_CACHE_TTL,
+    LLM_RESPONSE_CACHE_INTENTS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Changes with the instruction or either tier's model, so answers parsed
+# under an older prompt or model are never served
+PROMPT_VERSION = hashlib.sha256(
+    f"{TIERS['lite']}|{TIERS['main']}|{GEMINI_SYSTEM_INSTRUCTION_BASE}".encode()
+).hexdigest()[:12]
+
+# Messages mentioning a time are resolved against the current date by the LLM
+TIME_WORDS = re.compile(r'\b(hari|kemarin|besok|lusa|minggu|bulan|tahun|tanggal|jam|sekarang|tadi|nanti)\b')
+
+
+class ResponseCache:
+    """Parsed Gemini intents keyed on the normalized message.
+
+    "Cek saldo dong" and "cek saldo" share one entry. Only intents in
+    LLM_RESPONSE_CACHE_INTENTS are stored, and messages with numbers or time
+    words are never looked up, since their content depends on the date.
+    """
+
+    def __init__(self, cache: CacheMessage, ttl: int = LLM_RESPONSE_CACHE_TTL,
+                 intents=LLM_RESPONSE_CACHE_INTENTS):
+        self.redis_client = cache.redis_client
+        self.serializer = cache.serializer
+        self.ttl = ttl
+        self.intents = set(intents)
+        self.hits = 0
+        self.misses = 0
+        self.hit_seconds = 0.0
+
+    @staticmethod
+    def key(message: str) -> Optional[str]:
+        text = normalize_message(message)
+        if not text or re.search(r'\d', text) or TIME_WORDS.search(text):
+            return None
+        return f'llm:response:{PROMPT_VERSION}:{hashlib.sha256(text.encode()).hexdigest()}'
+
+    async def get(self, message: str) -> Optional[Dict]:
+        """Cached response shaped like the LLM one, or None."""
+        key = self.key(message)
+        if key is None:
+            return None
+
+        started = time.perf_counter()
+        try:
+            value = await self.redis_client.get(key)
+        except RedisError as error:
+            logger.warning(f'LLM response cache unavailable: {error}')
+            value = None
+        if value is None:
+            self.misses += 1
+            return None
+
+        response = self.serializer.loads(value)
+        self.hits += 1
+        self.hit_seconds += time.perf_counter() - started
+        logger.debug(f'LLM response cache hit {response["intent"]} | {self.stats()}')
+        return {**response, 'inputToken': 0, 'outputToken': 0}
+
+    async def put(self, message: str, response: Dict):
+        if response.get('intent') not in self.intents:
+            return
+        key = self.key(message)
+        if key is None:
+            return
+
+        value = {'intent': response['intent'], 'content': response.get('content', '')}
+        try:
+            await self.redis_client.set(key, self.serializer.dumps(value), ex=self.ttl)
+        except RedisError as error:
+            logger.warning(f'LLM response not cached: {error}')
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'avg_hit_ms': round(self.hit_seconds / self.hits * 1000, 3) if self.hits else 0.0,
+        }
@@ -0,0 +1,154 @@
+"""Daily cashflow rollup: incremental upsert, rebuild and consistency check.
+
+    python -m bot.services.rollup rebuild [userId]
+    python -m bot.services.rollup check [userId]
+"""
+import sys
+import asyncio
+import logging
+from decimal import Decimal
+from sqlalchemy import func, select, delete, insert
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from bot.services.database import AsyncSessionLocal
+from bot.models.cashflow_model import Cashflow
+from bot.models.cashflow_rollup_model import CashflowDailyRollup
+
+logger = logging.getLogger(__name__)
+
+
+def rollup_deltas(rows: list) -> list:
+    """Collapse cashflow insert rows into one delta per rollup key."""
+    deltas = {}
+    for row in rows:
+        flow_type = getattr(row['flowType'], 'value', row['flowType'])
+        key = (row['userId'], row['walletId'], row['transactionDate'].date(), flow_type)
+        total, count = deltas.get(key, (Decimal('0.00'), 0))
+        deltas[key] = (total + Decimal(row['total']), count + 1)
+
+    return [
+        {
+            'userId': user_id,
+            'walletId': wallet_id,
+            'day': day,
+            'flowType': flow_type,
+            'total': total,
+            'count': count,
+        }
+        for (user_id, wallet_id, day, flow_type), (total, count) in deltas.items()
+    ]
+
+
+async def apply_rollup(session: AsyncSession, rows: list):
+    """Add freshly inserted cashflow rows to the rollup.
+
+    Must run inside the same transaction as the cashflow INSERT so both
+    commit or roll back together.
+    """
+    deltas = rollup_deltas(rows)
+    if not deltas:
+        return
+
+    statement = mysql_insert(CashflowDailyRollup)
+    statement = statement.on_duplicate_key_update(
+        total=CashflowDailyRollup.total + statement.inserted.total,
+        count=CashflowDailyRollup.count + statement.inserted.count,
+    )
+    await session.execute(statement, deltas)
+
+
+def _raw_groups_query(user_id=None):
+    day = func.date(Cashflow.transactionDate)
+    query = (
+        select(
+            Cashflow.userId,
+            Cashflow.walletId,
+            day.label('day'),
+            Cashflow.flowType,
+            func.sum(Cashflow.total).label('total'),
+            func.count().label('count'),
+        )
+        .where(Cashflow.isActive == True)
+        .group_by(Cashflow.userId, Cashflow.walletId, day, Cashflow.flowType)
+    )
+    if user_id:
+        query = query.where(Cashflow.userId == user_id)
+    return query
+
+
+async def rebuild(user_id: str = None):
+    """Recompute the rollup from raw cashflow rows, for one user or everyone."""
+    async with AsyncSessionLocal() as session:
+        async with session.begin():
+            clear = delete(CashflowDailyRollup)
+            if user_id:
+                clear = clear.where(CashflowDailyRollup.userId == user_id)
+            await session.execute(clear)
+
+            # INSERT ... SELECT locks the scanned cashflow rows, writers that
+            # would upsert the rollup meanwhile wait for this transaction.
+            await session.execute(
+                insert(CashflowDailyRollup).from_select(
+                    ['userId', 'walletId', 'day', 'flowType', 'total', 'count'],
+                    _raw_groups_query(user_id)
+                )
+            )
+    logger.info(f'Rollup rebuilt for {user_id or "all users"}')
+
+
+async def check(user_id: str = None) -> list:
+    """Compare the rollup against raw cashflow rows, returns the mismatches."""
+    rollup_query = select(
+        CashflowDailyRollup.userId,
+        CashflowDailyRollup.walletId,
+        CashflowDailyRollup.day,
+        CashflowDailyRollup.flowType,
+        CashflowDailyRollup.total,
+        CashflowDailyRollup.count,
+    ).where(CashflowDailyRollup.count > 0)
+    if user_id:
+        rollup_query = rollup_query.where(CashflowDailyRollup.userId == user_id)
+
+    async with AsyncSessionLocal() as session:
+        raw = {tuple(row[:4]): (row.total, row.count) for row in await session.execute(_raw_groups_query(user_id))}
+        rolled = {tuple(row[:4]): (row.total, row.count) for row in await session.execute(rollup_query)}
+
+    mismatches = []
+    for key in raw.keys() | rolled.keys():
+        if raw.get(key) != rolled.get(key):
+            user, wallet, day, flow_type = key
+            mismatches.append({
+                'userId': user,
+                'walletId': wallet,
+                'day': day,
+                'flowType': flow_type.value,
+                'raw': raw.get(key),
+                'rollup': rolled.get(key),
+            })
+    return mismatches
+
+
+async def _main(command: str, user_id: str = None) -> int:
+    if command == 'rebuild':
+        await rebuild(user_id)
+        return 0
+
+    mismatches = await check(user_id)
+    for mismatch in mismatches:
+        logger.error(f'Rollup mismatch: {mismatch}')
+    logger.info(f'{len(mismatches)} rollup mismatch(es)')
+    return 1 if mismatches else 0
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if len(sys.argv) < 2 or sys.argv[1] not in ('rebuild', 'check'):
+        print(__doc__)
+        sys.exit(2)
+
+    sys.exit(asyncio.run(_main(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+import json
+import zlib
+import msgpack
+from bot.constants import (
+    CACHE_SERIALIZER,
+    CACHE_COMPRESS_THRESHOLD,
+    CACHE_COMPRESS_LEVEL
+)
+
+# Header byte in front of every binary value. JSON text never starts with
+# these bytes, which is how values written before the switch are still read.
+MSGPACK = b'\x01'
+MSGPACK_ZLIB = b'\x02'
+
+
+class JsonSerializer:
+    """Plain JSON text, the format CacheMessage used originally."""
+
+    def dumps(self, value) -> bytes:
+        return json.dumps(value).encode('utf-8')
+
+    def loads(self, data: bytes):
+        return _loads(data)
+
+
+class MsgpackSerializer:
+    """msgpack, zlib-compressed when the packed value exceeds `threshold` bytes."""
+
+    def __init__(self, threshold: int = CACHE_COMPRESS_THRESHOLD, level: int = CACHE_COMPRESS_LEVEL):
+        self.threshold = threshold
+        self.level = level
+
+    def dumps(self, value) -> bytes:
+        packed = msgpack.packb(value, use_bin_type=True)
+        if len(packed) > self.threshold:
+            compressed = zlib.compress(packed, self.level)
+            if len(compressed) < len(packed):
+                return MSGPACK_ZLIB + compressed
+        return MSGPACK + packed
+
+    def loads(self, data: bytes):
+        return _loads(data)
+
+
+def _loads(data: bytes):
+    """Decode any value we ever wrote: msgpack, compressed msgpack or legacy JSON."""
+    header = data[:1]
+    if header == MSGPACK:
+        return msgpack.unpackb(data[1:], raw=False)
+    if header == MSGPACK_ZLIB:
+        return msgpack.unpackb(zlib.decompress(data[1:]), raw=False)
+    return json.loads(data)
+
+
+SERIALIZERS = {
+    'json': JsonSerializer,
+    'msgpack': MsgpackSerializer,
+}
+
+
+def get_serializer(name: str = CACHE_SERIALIZER):
+    try:
+        return SERIALIZERS[name]()
+    except KeyError:
+        raise ValueError(f'Unknown cache serializer {name!r}, use one of {sorted(SERIALIZERS)}')
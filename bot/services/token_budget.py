@@ -0,0 +1,96 @@
+import time
+import logging
+from dataclasses import dataclass
+from redis.exceptions import RedisError
+from bot.services.cache import CacheMessage
+from bot.constants import (
+    LLM_BUDGET_WINDOW,
+    LLM_USER_TOKEN_BUDGET,
+    LLM_GLOBAL_TOKEN_BUDGET,
+    LLM_BUDGET_HARD_RATIO,
+)
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_SCOPE = 'global'
+
+
+class TokenBudgetExceeded(Exception):
+    """No LLM call allowed until the window slides on."""
+
+
+@dataclass
+class BudgetStatus:
+    user_tokens: int
+    global_tokens: int
+    # Past the soft budget: calls still go out, but only to the lite tier
+    over: bool
+
+
+class TokenBudget:
+    """Per-user and global Gemini token counters over a sliding window.
+
+    Each scope keeps one Redis counter per fixed window; usage is the current
+    counter plus the previous one weighted by how much of it still overlaps
+    the sliding window, so a check is a single MGET of four keys.
+    """
+
+    def __init__(self, cache: CacheMessage, window: int = LLM_BUDGET_WINDOW,
+                 user_budget: int = LLM_USER_TOKEN_BUDGET, global_budget: int = LLM_GLOBAL_TOKEN_BUDGET,
+                 hard_ratio: float = LLM_BUDGET_HARD_RATIO):
+        self.redis_client = cache.redis_client
+        self.window = window
+        self.user_budget = user_budget
+        self.global_budget = global_budget
+        self.hard_ratio = hard_ratio
+
+    def _key(self, scope: str, bucket: int) -> str:
+        return f'llm:tokens:{scope}:{bucket}'
+
+    async def usage(self, user_id: str):
+        """(user tokens, global tokens) used in the last window."""
+        now = time.time()
+        bucket = int(now // self.window)
+        overlap = 1 - (now % self.window) / self.window
+
+        values = await self.redis_client.mget(
+            self._key(user_id, bucket), self._key(user_id, bucket - 1),
+            self._key(GLOBAL_SCOPE, bucket), self._key(GLOBAL_SCOPE, bucket - 1),
+        )
+        user_now, user_before, global_now, global_before = (int(value or 0) for value in values)
+        return (
+            round(user_now + user_before * overlap),
+            round(global_now + global_before * overlap),
+        )
+
+    async def check(self, user_id: str) -> BudgetStatus:
+        """Raise TokenBudgetExceeded past the hard limit. Redis errors let
+        the call through rather than blocking every user."""
+        try:
+            user_tokens, global_tokens = await self.usage(user_id)
+        except RedisError as error:
+            logger.warning(f'Token budget unavailable, not enforced: {error}')
+            return BudgetStatus(0, 0, False)
+
+        if (user_tokens >= self.user_budget * self.hard_ratio
+                or global_tokens >= self.global_budget * self.hard_ratio):
+            logger.warning(f'Token budget exhausted | {user_id} | user {user_tokens} | global {global_tokens}')
+            raise TokenBudgetExceeded()
+
+        over = user_tokens >= self.user_budget or global_tokens >= self.global_budget
+        return BudgetStatus(user_tokens, global_tokens, over)
+
+    async def record(self, user_id: str, tokens: int):
+        if tokens <= 0:
+            return
+        bucket = int(time.time() // self.window)
+        try:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for scope in (user_id, GLOBAL_SCOPE):
+                    key = self._key(scope, bucket)
+                    pipe.incrby(key, tokens)
+                    # Still needed as the previous bucket during the next window
+                    pipe.expire(key, self.window * 2)
+                await pipe.execute()
+        except RedisError as error:
+            logger.warning(f'Token usage not recorded: {error}')
@@ -3,6 +3,7 @@ import json
 import re
 import logging
 from datetime import datetime
+from decimal import Decimal
 from bson import ObjectId
 
 from telegram import Update, ReplyKeyboardMarkup, InlineKeyboardButton, InlineKeyboardMarkup
@@ -56,11 +57,17 @@ class TelegramFinanceBot:
         # Conversation states
         self.WALLET_NAME, self.WALLET_BALANCE = range(2)
         
-    def create_chat_model(self, instruction, history=None):
-        """Create a chat model with given instruction and history."""
+    def create_chat_model(self, instruction, history=None, json_output=False):
+        """Create a chat model with given instruction and history.
+
+        json_output asks Gemini for a bare JSON answer (no code fences).
+        """
         return self.client.chats.create(
             model='gemini-2.5-flash',
-            config=types.GenerateContentConfig(system_instruction=instruction),
+            config=types.GenerateContentConfig(
+                system_instruction=instruction,
+                response_mime_type='application/json' if json_output else None
+            ),
             history=history
         )
 
@@ -74,18 +81,18 @@ class TelegramFinanceBot:
 
     def build_history_from_memory(self, user_id):
         """Build conversation history from memory cache."""
-        history = []
-        context = self.memory.get_context(user_id)
-        
-        if context and 'messages' in context and len(context['messages']) >= 2:
-            for message in context['messages']:
-                content = types.Content(
-                    role=message['role'], 
-                    parts=[types.Part.from_text(text=message['text'])]
-                )
-                history.append(content)
-        
-        return history if history else None
+        messages = self.memory.get_messages(user_id)
+
+        if len(messages) < 2:
+            return None
+
+        return [
+            types.Content(
+                role=message['role'],
+                parts=[types.Part.from_text(text=message['text'])]
+            )
+            for message in messages
+        ]
 
     # Command handlers
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -152,6 +159,7 @@ class TelegramFinanceBot:
             )
             
             self.wallet_manager.insert_wallet(wallet)
+            self.memory.bump_data_version(user.id)
             await update.message.reply_text("✅ Wallet berhasil ditambahkan!")
             
         except ValueError:
@@ -176,7 +184,7 @@ class TelegramFinanceBot:
 
         try:
             # Process message with AI
-            chat = self.create_chat_model(GEMINI_SYSTEM_INSTRUCTION_BASE)
+            chat = self.create_chat_model(GEMINI_SYSTEM_INSTRUCTION_BASE, json_output=True)
             response = chat.send_message(message)
             parsed_data = self.parse_json_response(response.text)
             parsed_data['message'] = message
@@ -231,7 +239,7 @@ class TelegramFinanceBot:
         instruction = GEMINI_SYSTEM_INSTRUCTION_PARSE.replace(
             '{d}', str(datetime.now().replace(microsecond=0))
         )
-        chat = self.create_chat_model(instruction, history)
+        chat = self.create_chat_model(instruction, history, json_output=True)
 
         self.memory.save_message(user_id, parsed_data['message'], 'user')
         response = chat.send_message(parsed_data['message'])
@@ -276,7 +284,7 @@ class TelegramFinanceBot:
 
     async def save_confirmed_transaction(self, query, user):
         """Save confirmed transaction to database."""
-        chat_log = self.memory.get_context(user.id)['messages']
+        chat_log = self.memory.get_messages(user.id)
         
         # Extract wallet information from chat log
         wallet_name = self.extract_wallet_from_chat_log(chat_log)
@@ -289,9 +297,10 @@ class TelegramFinanceBot:
         # Process and save transactions
         transaction_data = self.extract_transaction_data_from_chat_log(chat_log)
         total_amount = 0
+        cashflow_items = []
         
         for transaction in transaction_data:
-            cashflow_item = CashflowItem(
+            cashflow_items.append(CashflowItem(
                 id=str(ObjectId()),
                 userId=user.id,
                 walletId=wallet.id,
@@ -304,17 +313,23 @@ class TelegramFinanceBot:
                 flowType=transaction['flowType'],
                 price=transaction['price'],
                 total=transaction['price'] * transaction['quantity'],
-            )
+            ))
             
             if transaction['flowType'] == 'income':
                 total_amount -= transaction['price'] * transaction['quantity']
             if transaction['flowType'] == 'expense':
                 total_amount += transaction['price'] * transaction['quantity']
 
-            self.cashflow_manager.insert_cashflow(cashflow_item)
+        # Insert all rows and update wallet balance in one transaction
+        saved = self.cashflow_manager.insert_cashflows_bulk(
+            cashflow_items, wallet.id, Decimal(str(-total_amount))
+        )
+        if not saved:
+            await query.edit_message_text('❌ Gagal menyimpan data transaksi.')
+            return
+
+        self.memory.bump_data_version(user.id)
 
-        # Update wallet balance
-        self.wallet_manager.update_balance(wallet.id, wallet.balance - total_amount)
         await query.edit_message_text('✅ Data telah disimpan. Terima kasih!')
 
     def extract_wallet_from_chat_log(self, chat_log):
@@ -0,0 +1,52 @@
+texts = [
+'Hari ini beli 5 kg beras seharga 12000 per kg',
+'Bayar listrik 250000 dan beli pulsa 100000',
+'Jual 10 porsi nasi goreng 15000 rupiah',
+'Dapat bayaran servis motor 3 kali @100000',
+'Jual 20 gelas es teh 3000 dan 10 gelas jus alpukat 7000',
+'Gaji masuk 10 juta rupiah',
+'hari ini jual 20 nasi uduk seharga 15000 per nasi dibayar cash',
+'kemarin beli bensin 50000 pakai gopay',
+'beli kopi 18000 pakai dana',
+'bayar kos 1500000 lewat bank bri',
+'tadi pagi beli sarapan 15000',
+'jual 3 kaos 75000 per kaos via transfer bca',
+'beli sabun 2 pcs 5000',
+'narik gojek dapat 45000 masuk gopay',
+'terima transfer dari klien 2 juta ke mandiri',
+'bayar parkir 2000 cash',
+'beli token listrik 100 ribu',
+'dapat uang jajan 50000',
+'beli bahan baku 2 kg tepung 14000 per kg',
+'jual kue 30 biji harga 2500',
+'bayar internet bulan ini 350000 pakai bca',
+'saya beli nasgor seharga 5000 lewat cash',
+'hari ini saya membeli nasgor seharga 5000 lewat cash',
+'3 hari lalu beli obat 45000',
+'minggu lalu servis laptop 200000',
+'beli pulsa 25rb',
+'bayar cicilan motor 800rb lewat bri',
+'jual 5 bungkus keripik 10000',
+'pengeluaran beli galon 20000',
+'pemasukan dari jualan online 350000 ke dana',
+'beli makan siang 25000 pakai ovo',
+'kemarin jual es campur 15 mangkok 8000',
+'dapat tip 20000',
+'beli gas elpiji 3 kg 22000',
+'bayar arisan 100000',
+'isi saldo gopay 100000 dari bca',
+'beli buku 2 buah 45000',
+'terima gaji 5 juta ke bank mandiri',
+'ongkos ojek 12000',
+'jual sayur 10 ikat 3000 per ikat',
+'beli rokok 30000',
+'bayar laundry 4 kg 7000 per kg',
+'hasil jualan hari ini 750000 cash',
+'beli telur 2 kg 28000 per kg pakai cash',
+'bayar uang sekolah anak 500000',
+'potong rambut 35000',
+'beli obat nyamuk 12000 dan sabun cuci 8000',
+'dapat bonus 1 juta',
+'saldo gopay kepake buat beli makan 30000',
+'pakai saldo dana beli pulsa 20000',
+]
@@ -0,0 +1,62 @@
+texts = [
+'halo',
+'hai bot',
+'selamat pagi',
+'terima kasih',
+'makasih ya',
+'kamu siapa?',
+'bisa bantu apa saja?',
+'cara pakai bot ini gimana',
+'bagaimana cara mencatat transaksi',
+'gimana cara tambah wallet',
+'apa itu cashflow',
+'tips menabung dong',
+'bagaimana cara mengatur keuangan',
+'apa bedanya income dan expense',
+'bantuan',
+'tolong',
+'oke',
+'siapa yang membuat kamu',
+'bot ini gratis?',
+'apakah data saya aman',
+'saya bingung',
+'test',
+'p',
+'cara hapus transaksi',
+'bisa pakai bahasa inggris?',
+'cara lihat laporan',
+'bagaimana cara cek saldo wallet',
+'apa fungsi wallet di bot ini',
+'kenapa transaksi saya gagal',
+'bagaimana menghitung keuntungan usaha',
+'berapa kurs dollar hari ini',
+'cuaca hari ini bagaimana',
+'ceritakan lelucon',
+'selamat malam bot',
+'apa kabar',
+'kenapa saldo saya berkurang',
+'kenapa saldo wallet saya minus',
+'mengapa saldo dompet saya tidak bertambah',
+'kok saldo saya beda dengan di bank',
+'kenapa uang di wallet saya cepat habis',
+'saldo saya salah, gimana cara betulinnya',
+'bagaimana cara mengubah saldo wallet',
+'cara koreksi saldo dompet',
+'kenapa wallet saya tidak muncul',
+'bagaimana cara menghapus wallet',
+'cara ganti nama wallet',
+'kenapa saldo tidak sesuai',
+'kok saldo dompet saya berkurang sendiri',
+'saldo saya aneh, kenapa ya',
+'apa maksud saldo di wallet',
+'bagaimana saldo dihitung',
+'kenapa uang saya di dompet kurang',
+'gimana cara menambah saldo awal wallet',
+'apakah saldo wallet bisa diedit',
+'kenapa saldo wallet saya nol',
+'mengapa uang saya berkurang terus',
+'tips supaya saldo tidak cepat habis',
+'bagaimana cara mengatur uang di dompet',
+'kenapa dompet saya kosong terus',
+'saldo saya kok tidak update',
+]
@@ -0,0 +1,32 @@
+texts = [
+'laporan minggu ini',
+'minta laporan bulan ini',
+'tampilkan laporan pengeluaran minggu lalu',
+'laporan pemasukan bulan juli',
+'lihat laporan harian',
+'rekap transaksi minggu ini',
+'buatkan grafik pengeluaran bulan ini',
+'tampilkan pie chart pengeluaran',
+'laporan cashflow 7 hari terakhir',
+'berapa total pengeluaran saya bulan ini',
+'total pemasukan minggu ini berapa',
+'rekap pengeluaran per hari',
+'laporan transaksi wallet gopay bulan ini',
+'grafik line pemasukan bulan lalu',
+'ringkasan keuangan minggu ini',
+'tolong kirim laporan bulanan',
+'pengeluaran saya kemarin apa saja',
+'lihat transaksi hari ini',
+'laporan per bulan tahun ini',
+'rekap cashflow bulan agustus',
+'tampilkan tabel transaksi minggu lalu',
+'laporan pengeluaran cash',
+'analisis pengeluaran bulan ini',
+'laporan income dan expense',
+'history transaksi saya',
+'riwayat transaksi bulan ini',
+'laporan keuangan 30 hari terakhir',
+'rekap mingguan dong',
+'laporan dari tanggal 1 sampai 15',
+'grafik pengeluaran per kategori',
+]
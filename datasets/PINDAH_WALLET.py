@@ -0,0 +1,22 @@
+texts = [
+'pindahkan 100000 dari bca ke gopay',
+'transfer 50000 dari cash ke dana',
+'pindah saldo bri ke mandiri 1 juta',
+'top up gopay 100000 dari bca biaya admin 1000',
+'tarik tunai 500000 dari bri',
+'pindahkan uang dari dana ke ovo 25000',
+'transfer antar wallet 200000 dari mandiri ke cash',
+'setor tunai 300000 ke bca',
+'kirim 150000 dari gopay ke dana',
+'isi ulang ovo dari bri 50000 fee 1000',
+'pindah dana 2 juta dari tabungan ke cash',
+'ambil uang di atm bca 1 juta',
+'top up shopeepay 75000 pakai bni',
+'transfer dari cash ke bank bri 400000',
+'pindahkan semua saldo dana ke gopay',
+'tarik saldo gopay ke bca 200000',
+'mutasi 100000 dari mandiri ke jago',
+'pindahin 50rb dari ovo ke cash',
+'setor 500000 ke rekening mandiri dari cash',
+'transfer 1 juta ke wallet tabungan dari bca',
+]
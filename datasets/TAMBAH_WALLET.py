@@ -0,0 +1,32 @@
+texts = [
+'buatkan saya wallet cash dengan saldo awal 10000',
+'tambah wallet gopay',
+'tambah dompet dana saldo 50000',
+'buat wallet baru bank bri',
+'saya mau bikin dompet ovo',
+'tolong tambahkan wallet bca dengan saldo 2 juta',
+'buat dompet baru namanya tabungan',
+'tambahkan e-wallet shopeepay',
+'bikin wallet mandiri saldo awal 500000',
+'daftarkan dompet cash saya',
+'tambah rekening bank bni',
+'saya ingin menambah wallet baru',
+'buatkan dompet gopay saldo 0',
+'tambah wallet bareksa 1 juta',
+'buat wallet jago dengan saldo 250000',
+'bikin dompet baru dong',
+'tolong buatkan wallet untuk tabungan',
+'saya mau tambah dompet digital',
+'add wallet dana',
+'tambah akun bank bri saldo 3 juta',
+'buat dompet kas toko',
+'tambahkan wallet cash saldo awal 100 ribu',
+'bikin wallet seabank',
+'buka wallet baru linkaja',
+'tambah dompet untuk usaha',
+'buat wallet baru saldo 75000',
+'tambah wallet kartu kredit',
+'bikinin dompet ovo saldo 20000',
+'saya perlu wallet baru untuk belanja',
+'tambahkan dompet bank mandiri',
+]
@@ -17,6 +17,8 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+MAX_HISTORY_MESSAGES = 20
+
 class cacheMessage:
     def __init__(self):
         self.redis_client = redis.Redis(
@@ -28,6 +30,7 @@ class cacheMessage:
         )
 
     def save_message(self, user_id, text, role):
+        """Tambah satu pesan ke history (RPUSH + LTRIM + EXPIRE dalam satu pipeline)"""
         message_data = {
             'id': int(time.time()),
             'text': text,
@@ -36,49 +39,29 @@ class cacheMessage:
         }
 
         self.save_context(user_id, message_data)
-        
+
     def save_context(self, user_id, message_data):
-        """Simpan konteks percakapan"""
-        key = f"user:context:{user_id}"
-        
-        # Ambil konteks yang ada
-        existing_context = self.get_context(user_id)
-        
-        if existing_context:
-            existing_context['messages'].append(message_data)
-            existing_context['updated_at'] = datetime.now().isoformat()
-        else:
-            existing_context = {
-                'messages': [message_data],
-                'topic': 'general',
-                'intent': None,
-                'entities': {},
-                'created_at': datetime.now().isoformat(),
-                'updated_at': datetime.now().isoformat()
-            }
-        
+        """Tambah satu message_data ke history (dipertahankan untuk pemanggil lama)"""
+        key = f"user:history:{user_id}"
+        pipe = self.redis_client.pipeline()
+        pipe.rpush(key, json.dumps(message_data))
         # Batasi jumlah pesan (maksimal 20)
-        if len(existing_context['messages']) > 20:
-            existing_context['messages'] = existing_context['messages'][-20:]
-        
-        # Simpan dengan TTL 
-        self.redis_client.setex(
-            key, 
-            REDIS_TIME*60, 
-            json.dumps(existing_context)
-        )
-        
-        # Update last activity
-        self.update_last_activity(user_id)
-    
+        pipe.ltrim(key, -MAX_HISTORY_MESSAGES, -1)
+        pipe.expire(key, REDIS_TIME*60)
+        pipe.setex(f"user:last_activity:{user_id}", REDIS_TIME*60, str(int(time.time())))
+        pipe.execute()
+
+    def get_messages(self, user_id):
+        """Ambil history percakapan, urut dari yang paling lama"""
+        messages = self.redis_client.lrange(f"user:history:{user_id}", 0, -1)
+        return [json.loads(message) for message in messages]
+
     def get_context(self, user_id):
-        """Ambil konteks percakapan"""
-        key = f"user:context:{user_id}"
-        context_data = self.redis_client.get(key)
-        
-        if context_data:
-            return json.loads(context_data)
-        return None
+        """Bentuk lama {'messages': [...]} di atas history list, None jika kosong"""
+        messages = self.get_messages(user_id)
+        if not messages:
+            return None
+        return {'messages': messages}
     
     def save_session(self, user_id, session_data):
         """Simpan session user"""
@@ -127,24 +110,31 @@ class cacheMessage:
     
     def is_context_expired(self, user_id):
         """Cek apakah konteks sudah expired"""
-        key = f"user:context:{user_id}"
+        key = f"user:history:{user_id}"
         return not self.redis_client.exists(key)
     
     def clear_user_data(self, user_id):
         """Hapus semua data user"""
-        keys_to_delete = [
+        self.redis_client.delete(
+            f"user:history:{user_id}",
             f"user:context:{user_id}",
             f"user:session:{user_id}",
             f"user:state:{user_id}",
             f"user:last_activity:{user_id}",
             f"user:message_count:{user_id}"
-        ]
-        
-        for key in keys_to_delete:
-            self.redis_client.delete(key)
+        )
     
+    def bump_data_version(self, user_id):
+        """Naikkan versi data user setelah insert cashflow/wallet (dipakai cache laporan bot dan ETag web)"""
+        pipe = self.redis_client.pipeline(transaction=False)
+        # Key hilang (evicted / Redis restart): mulai dari epoch ms, bukan 0, agar ETag lama tidak cocok lagi
+        pipe.set(f"user:dataver:{user_id}", int(time.time() * 1000), nx=True)
+        pipe.incr(f"user:dataver:{user_id}")
+        pipe.set(f"user:datamod:{user_id}", int(time.time()))
+        _, version, _ = pipe.execute()
+        return version
+
     def extend_context_ttl(self, user_id):
         """Perpanjang TTL konteks (jika masih dalam sesi aktif)"""
-        key = f"user:context:{user_id}"
-        if self.redis_client.exists(key):
-            self.redis_client.expire(key, REDIS_TIME*60)  # Reset ke 10 menit
+        # EXPIRE tidak berpengaruh jika key sudah tidak ada
+        self.redis_client.expire(f"user:history:{user_id}", REDIS_TIME*60)  # Reset ke 10 menit
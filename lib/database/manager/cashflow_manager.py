@@ -2,6 +2,7 @@
 from mysql.connector import Error
 from typing import List
 from datetime import date
+from decimal import Decimal
 import logging
 
 from lib.database.model.cashflow_model import CashflowItem
@@ -12,6 +13,25 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Dijalankan di transaksi yang sama dengan INSERT cashflow
+ROLLUP_UPSERT_QUERY = """
+INSERT INTO cashflow_daily_rollup (userId, walletId, day, flowType, total, count)
+VALUES (%s, %s, %s, %s, %s, %s)
+ON DUPLICATE KEY UPDATE total = total + VALUES(total), count = count + VALUES(count)
+"""
+
+
+def rollup_rows(items: List[CashflowItem]) -> list:
+    """Gabungkan item cashflow per (userId, walletId, hari, flowType)"""
+    deltas = {}
+    for item in items:
+        key = (item.userId, item.walletId, item.transactionDate.date(), item.flowType)
+        total, count = deltas.get(key, (Decimal('0.00'), 0))
+        deltas[key] = (total + Decimal(str(item.total)), count + 1)
+
+    return [(*key, total, count) for key, (total, count) in deltas.items()]
+
+
 class CashflowManager:
     """Class utama untuk mengelola cashflow"""
     
@@ -27,6 +47,7 @@ class CashflowManager:
         VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
         """
         
+        conn = None
         try:
             conn = self.db.get_connection()
             cursor = conn.cursor()
@@ -35,14 +56,69 @@ class CashflowManager:
                 item.activityName, item.description, item.categoryId, item.quantity, 
                 item.unit, item.flowType, item.isActive, item.price, item.total
             ))
+            if item.isActive:
+                cursor.executemany(ROLLUP_UPSERT_QUERY, rollup_rows([item]))
             conn.commit()
-            conn.close()
             logger.info(f'Cashflow {item.activityName} berhasil diinsert')
             return True
             
         except Error as e:
             logger.error(f'Error insert cashflow: {e}')
+            if conn:
+                conn.rollback()
+            return False
+
+        finally:
+            if conn:
+                conn.close()
+        
+    def insert_cashflows_bulk(self, items: List[CashflowItem], wallet_id: str = None,
+                              balance_delta: Decimal = None) -> bool:
+        """Insert banyak cashflow + update balance wallet dalam satu transaksi"""
+        if not items:
+            return True
+
+        query = """
+        INSERT INTO cashflow 
+        (id, userId, walletId, transactionDate, activityName, description, categoryId, 
+         quantity, unit, flowType, isActive, price, total)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """
+
+        conn = None
+        try:
+            conn = self.db.get_connection()
+            cursor = conn.cursor()
+            # mysql-connector menulis ulang executemany INSERT menjadi satu multi-row VALUES
+            cursor.executemany(query, [
+                (
+                    item.id, item.userId, item.walletId, item.transactionDate, 
+                    item.activityName, item.description, item.categoryId, item.quantity, 
+                    item.unit, item.flowType, item.isActive, item.price, item.total
+                )
+                for item in items
+            ])
+            cursor.executemany(ROLLUP_UPSERT_QUERY, rollup_rows([item for item in items if item.isActive]))
+
+            if wallet_id and balance_delta:
+                cursor.execute(
+                    "UPDATE wallets SET balance = balance + %s WHERE id = %s",
+                    (balance_delta, wallet_id)
+                )
+
+            conn.commit()
+            logger.info(f'{len(items)} cashflow berhasil diinsert')
+            return True
+
+        except Error as e:
+            logger.error(f'Error insert cashflow bulk: {e}')
+            if conn:
+                conn.rollback()
             return False
+
+        finally:
+            if conn:
+                conn.close()
         
     def get_cashflows_by_date_range(self, user_id: str, start_date: date, end_date: date) -> List[CashflowItem]:
         """Ambil cashflow berdasarkan user ID dan rentang tanggal"""
@@ -0,0 +1,76 @@
+import os
+import re
+import glob
+import logging
+from lib.database.db import DatabaseConnection
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sql', 'migrations')
+
+# MySQL has no CREATE INDEX IF NOT EXISTS
+CREATE_INDEX = re.compile(r'^CREATE\s+(?:UNIQUE\s+)?INDEX\s+`?(\w+)`?\s+ON\s+`?(\w+)`?', re.IGNORECASE)
+
+
+def split_statements(sql):
+    lines = [line for line in sql.splitlines() if not line.strip().startswith('--')]
+    return [statement.strip() for statement in '\n'.join(lines).split(';') if statement.strip()]
+
+
+def index_exists(cursor, table, index):
+    cursor.execute(
+        """SELECT 1 FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s LIMIT 1""",
+        (table, index)
+    )
+    return cursor.fetchone() is not None
+
+
+def apply_migration(cursor, path):
+    """Jalankan satu file migration. CREATE INDEX dilewati jika index sudah ada,
+    misalnya karena tabel dibuat dari sql/initial_table.sql terbaru."""
+    with open(path, encoding='utf-8') as f:
+        for statement in split_statements(f.read()):
+            match = CREATE_INDEX.match(statement)
+            if match and index_exists(cursor, match.group(2), match.group(1)):
+                logger.info(f'Index {match.group(1)} already exists, skipped')
+                continue
+            cursor.execute(statement)
+
+
+def main():
+    """Jalankan file sql/migrations/NNN_*.sql yang belum tercatat di schema_migrations"""
+    db = DatabaseConnection()
+    conn = db.get_connection()
+    cursor = conn.cursor()
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version VARCHAR(255) PRIMARY KEY,
+        appliedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    cursor.execute("SELECT version FROM schema_migrations")
+    applied = {row[0] for row in cursor.fetchall()}
+
+    for path in sorted(glob.glob(os.path.join(MIGRATIONS_DIR, '*.sql'))):
+        version = os.path.splitext(os.path.basename(path))[0]
+        if version in applied:
+            continue
+
+        logger.info(f'Applying {version}')
+        apply_migration(cursor, path)
+
+        cursor.execute("INSERT INTO schema_migrations (version) VALUES (%s)", (version,))
+        conn.commit()
+
+    conn.close()
+    logger.info('Database up to date')
+
+
+if __name__ == '__main__':
+    main()
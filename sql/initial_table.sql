@@ -37,10 +37,24 @@ CREATE TABLE cashflow (
     createdAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updatedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
 
-    INDEX idx_user (userId),
+    -- Index untuk filter userId + isActive/walletId + rentang transactionDate
+    INDEX idx_user_active_date (userId, isActive, transactionDate),
+    INDEX idx_user_wallet_date (userId, walletId, transactionDate),
     INDEX idx_wallet (walletId)
 );
 
+CREATE TABLE cashflow_daily_rollup (
+    userId CHAR(24) NOT NULL,
+    walletId CHAR(24) NOT NULL,
+    day DATE NOT NULL,
+    flowType ENUM('income', 'expense', 'transfer') NOT NULL,
+    total DECIMAL(17,2) NOT NULL DEFAULT 0.00,
+    count INT NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (userId, walletId, day, flowType),
+    INDEX idx_user_day (userId, day)
+);
+
 CREATE TABLE wallets (
     id CHAR(24) PRIMARY KEY,
     userId CHAR(24) NOT NULL,
@@ -0,0 +1,13 @@
+-- 001: composite indexes untuk query cashflow berdasarkan rentang tanggal
+--
+-- get_cashflows_by_date_range, transaction_controller dan laporan memfilter
+-- userId + isActive + transactionDate lalu ORDER BY transactionDate DESC.
+-- get_cashflows_by_wallet memfilter userId + walletId + transactionDate.
+-- Dengan index ini MySQL cukup range scan (mundur) tanpa filesort.
+
+CREATE INDEX idx_user_active_date ON cashflow (userId, isActive, transactionDate);
+CREATE INDEX idx_user_wallet_date ON cashflow (userId, walletId, transactionDate);
+
+-- Index lama idx_user (atau ix_cashflow_userId jika tabel dibuat oleh
+-- SQLAlchemy) sudah tercakup oleh prefix idx_user_active_date dan boleh
+-- di-drop manual; tidak di-drop di sini karena namanya beda per instalasi.
@@ -0,0 +1,27 @@
+-- 002: rollup harian cashflow per user, wallet, hari dan flowType
+--
+-- Di-update di transaksi yang sama dengan setiap insert cashflow, sehingga
+-- laporan harian/mingguan/bulanan cukup membaca O(jumlah hari) baris.
+-- Isi awal dari cashflow yang sudah ada dilakukan di bawah; perbaikan
+-- berikutnya: python -m bot.services.rollup rebuild
+
+CREATE TABLE IF NOT EXISTS cashflow_daily_rollup (
+    userId CHAR(24) NOT NULL,
+    walletId CHAR(24) NOT NULL,
+    day DATE NOT NULL,
+    flowType ENUM('income', 'expense', 'transfer') NOT NULL,
+    total DECIMAL(17,2) NOT NULL DEFAULT 0.00,
+    count INT NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (userId, walletId, day, flowType),
+    INDEX idx_user_day (userId, day)
+);
+
+-- Backfill dari cashflow aktif yang sudah ada. ON DUPLICATE KEY menimpa
+-- dengan nilai hasil hitung ulang, jadi aman dijalankan lebih dari sekali.
+INSERT INTO cashflow_daily_rollup (userId, walletId, day, flowType, total, count)
+SELECT userId, walletId, DATE(transactionDate), flowType, COALESCE(SUM(total), 0), COUNT(*)
+FROM cashflow
+WHERE isActive = TRUE
+GROUP BY userId, walletId, DATE(transactionDate), flowType
+ON DUPLICATE KEY UPDATE total = VALUES(total), count = VALUES(count);
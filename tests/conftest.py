@@ -0,0 +1,9 @@
+import os
+
+# bot.constants reads these at import; nothing here connects to them
+os.environ.setdefault('MYSQL_HOST', 'localhost')
+os.environ.setdefault('MYSQL_PORT', '3306')
+os.environ.setdefault('MYSQL_USER', 'test')
+os.environ.setdefault('MYSQL_PASSWORD', 'test')
+os.environ.setdefault('MYSQL_DATABASE', 'test')
+os.environ.setdefault('GEMINI_API_KEY', 'test')
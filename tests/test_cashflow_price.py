@@ -0,0 +1,95 @@
+import asyncio
+from decimal import Decimal
+from types import SimpleNamespace
+import pytest
+from bot.services.intent_schema import IntentEnvelope
+from bot.helpers.output_messages import render_grouped_table
+from bot.helpers.text_util import parse_nominal
+from bot.handlers.cashflow import CashflowHandler
+
+# "beli kopi": the model leaves price null when the message has none
+NO_PRICE = (
+    '{"intent": "CATAT_TRANSAKSI", "transactions": [{"date": "2025-07-22 10:15:00", '
+    '"activityName": "kopi", "quantity": 1, "unit": "unit", "flowType": "expense", '
+    '"itemType": "product", "price": null, "wallet": "cash"}]}'
+)
+
+
+class FakeCache:
+    def __init__(self):
+        self.updates = []
+
+    async def update_state(self, user_id, fields, expected_rev=None):
+        self.updates.append(fields)
+        return expected_rev + 1
+
+
+class FakeMessage:
+    def __init__(self, text):
+        self.text = text
+        self.replies = []
+
+    async def reply_text(self, text, **kwargs):
+        self.replies.append((text, kwargs))
+
+
+def make_update(text):
+    return SimpleNamespace(effective_user=SimpleNamespace(id=1), message=FakeMessage(text))
+
+
+def no_price_state():
+    return {**IntentEnvelope.model_validate_json(NO_PRICE).to_response(), 'rev': 1}
+
+
+def test_render_without_price():
+    table = render_grouped_table(no_price_state()['content'])
+    assert 'kopi' in table
+    assert '-' in table
+
+
+def test_total_requires_price():
+    row = no_price_state()['content'][0]
+    with pytest.raises(ValueError):
+        CashflowHandler.calculate_total(row)
+
+    row['price'] = 15000
+    assert CashflowHandler.calculate_total(row) == Decimal('15000')
+
+
+def test_asks_for_price_before_confirming():
+    handler = CashflowHandler(None, FakeCache(), None)
+    update = make_update('beli kopi')
+
+    asyncio.run(handler.input_cashflow_by_text(update, None, no_price_state()))
+
+    (text, kwargs), = update.message.replies
+    assert 'Harga kopi' in text
+    assert 'reply_markup' not in kwargs
+
+
+def test_price_reply_fills_state_and_confirms():
+    cache = FakeCache()
+    handler = CashflowHandler(None, cache, None)
+    state = no_price_state()
+
+    update = make_update('bukan angka')
+    asyncio.run(handler.fill_price(update, None, state))
+    assert not cache.updates
+    assert 'Harga kopi' in update.message.replies[0][0]
+
+    update = make_update('15rb')
+    asyncio.run(handler.fill_price(update, None, state))
+    assert cache.updates[-1]['content'][0]['price'] == 15000
+    assert 'reply_markup' in update.message.replies[-1][1]
+
+
+@pytest.mark.parametrize('text, value', [
+    ('15000', 15000),
+    ('15.000', 15000),
+    ('15rb', 15000),
+    ('20 ribu', 20000),
+    ('1,5jt', 1500000),
+    ('gratis', None),
+])
+def test_parse_nominal(text, value):
+    assert parse_nominal(text) == value
@@ -0,0 +1,4 @@
+from bot.services.intent_classifier import main
+
+if __name__ == '__main__':
+    main()